@@ -0,0 +1,213 @@
+from typing import TYPE_CHECKING, Optional
+
+from BaseClasses import CollectionState, Location
+
+from .Rules import RequiresArea, RuleCompiler, normalize_requires, get_function_nodes, split_requires_dict
+from .Helpers import format_state_prog_items_key, ProgItemsCat
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+if TYPE_CHECKING:
+    from . import ManualWorld
+
+# A term is a set of (atom index, negated) literals that all have to be true, a requires is a list of terms where any of them can be true
+Term = frozenset[tuple[int, bool]]
+
+class NotBatchable(Exception):
+    """The requires of a location can't be turned into item count checks, it uses a function that needs the state for example"""
+
+class BatchRuleEvaluator:
+    """Evaluate the access of every location of a player at once.\n
+    The requires of the locations are lowered once into lists of terms over atoms, an atom being "the count of this item or category
+    is at least this much". Checking the locations then only needs the counts of the state: with numpy the literals of every term are
+    checked at once and summed per term with numpy.add.reduceat, without it the same tables are walked in python.\n
+    Locations whose rule can't be lowered (functions that use the state, rules changed by hooks, ...) call their own access rule."""
+
+    maximum_terms_per_location: int = 256
+    """Locations whose requires expand into more terms than this use their own access rule instead"""
+
+    def __init__(self, world: "ManualWorld"):
+        self.world = world
+        self.player = world.player
+        self.compiler: RuleCompiler = world.rule_compiler
+        self.locations: list[Location] = list(world.multiworld.get_locations(world.player))
+
+        self.counter_keys: list[str] = []
+        self.counter_indexes: dict[str, int] = {}
+        self.atoms: list[tuple[int, int]] = [] # (counter index, count needed)
+        self.atom_indexes: dict[tuple[int, int], int] = {}
+        self.location_terms: list[Optional[list[Term]]] = []
+        self.area_terms: dict[str, list[Term]] = {}
+
+        for location in self.locations:
+            try:
+                self.location_terms.append(self.lower_location(location))
+            except NotBatchable:
+                self.location_terms.append(None)
+
+        self.fallback_locations = [index for index, terms in enumerate(self.location_terms) if terms is None]
+        self.region_names = list({location.parent_region.name for location in self.locations})
+        region_indexes = {name: index for index, name in enumerate(self.region_names)}
+        self.location_regions = [region_indexes[location.parent_region.name] for location in self.locations]
+
+        if numpy is not None:
+            self.build_term_arrays()
+
+    def lower_location(self, location: Location) -> list[Term]:
+        rule, areas = self.compiler.location_areas.get(location.name, (None, ()))
+        if rule is None or location.access_rule is not rule:
+            raise NotBatchable(location.name)
+
+        terms = [frozenset()]
+        for area in areas:
+            terms = self.and_terms(terms, self.lower_area(area))
+        return terms
+
+    def lower_area(self, area: RequiresArea) -> list[Term]:
+        if area is None or area.requires is None:
+            return [frozenset()]
+
+        key = normalize_requires(area.requires)
+        if key not in self.area_terms:
+            if isinstance(area.requires, str):
+                tree = self.compiler.fold_requires_string(key, area)
+                if get_function_nodes(tree):
+                    raise NotBatchable(area.name)
+                self.area_terms[key] = self.lower_node(tree, area)
+            elif not area.requires:
+                self.area_terms[key] = [frozenset()]
+            else:
+                or_groups, required_items = split_requires_dict(area.requires)
+                terms = [frozenset(self.literal(item_name, item_count) for item_name, item_count in group) for group in or_groups]
+                terms.append(frozenset(self.literal(item_name, item_count) for item_name, item_count in required_items))
+                self.area_terms[key] = self.or_terms(terms, [])
+        return self.area_terms[key]
+
+    def lower_node(self, node: tuple, area: RequiresArea, negated: bool = False) -> list[Term]:
+        node_type = node[0]
+
+        if node_type == "const":
+            return [frozenset()] if node[1] != negated else []
+
+        if node_type == "not":
+            return self.lower_node(node[1], area, not negated)
+
+        if node_type in ("and", "or"):
+            children = [self.lower_node(child, area, negated) for child in node[1:]]
+            # not (a and b) is (not a) or (not b) and the other way around
+            if (node_type == "and") != negated:
+                terms = [frozenset()]
+                for child in children:
+                    terms = self.and_terms(terms, child)
+                return terms
+            terms = []
+            for child in children:
+                terms = self.or_terms(terms, child)
+            return terms
+
+        if node_type == "function":
+            raise NotBatchable(area.name)
+
+        item_name = node[1]
+        required_count = self.compiler.required_count(node, area)
+        if node_type == "category":
+            # an unknown or empty category can never be satisfied
+            if not self.compiler.category_items(item_name):
+                return [] if not negated else [frozenset()]
+            item_name = format_state_prog_items_key(ProgItemsCat.CATEGORY, item_name)
+
+        atom, _ = self.literal(item_name, required_count)
+        return [frozenset({(atom, negated)})]
+
+    def literal(self, counter_key: str, count: int) -> tuple[int, bool]:
+        counter_index = self.counter_indexes.setdefault(counter_key, len(self.counter_keys))
+        if counter_index == len(self.counter_keys):
+            self.counter_keys.append(counter_key)
+
+        atom = (counter_index, count)
+        atom_index = self.atom_indexes.setdefault(atom, len(self.atoms))
+        if atom_index == len(self.atoms):
+            self.atoms.append(atom)
+        return atom_index, False
+
+    def and_terms(self, terms: list[Term], other_terms: list[Term]) -> list[Term]:
+        result = []
+        for term in terms:
+            for other_term in other_terms:
+                combined = term | other_term
+                # a term needing an atom to be both true and false can never be true
+                if any((atom, not negated) in combined for atom, negated in combined):
+                    continue
+                if combined not in result:
+                    result.append(combined)
+                    if len(result) > self.maximum_terms_per_location:
+                        raise NotBatchable()
+        return result
+
+    def or_terms(self, terms: list[Term], other_terms: list[Term]) -> list[Term]:
+        result = list(terms)
+        for term in other_terms:
+            if term not in result:
+                result.append(term)
+        if len(result) > self.maximum_terms_per_location:
+            raise NotBatchable()
+        return result
+
+    def build_term_arrays(self):
+        """Flatten the terms into the literals of every term one after the other, each term being the slice from its start to the next one.
+        The memory this takes grows with the number of literals instead of with the number of terms times the number of atoms"""
+        literal_atoms = []
+        literal_negated = []
+        term_starts = []
+        term_locations = []
+        self.always_met = numpy.zeros(len(self.locations), dtype=bool)
+
+        for index, terms in enumerate(self.location_terms):
+            for term in terms or ():
+                if not term:
+                    # an empty term has nothing to check, so the location is always met
+                    self.always_met[index] = True
+                    continue
+                term_starts.append(len(literal_atoms))
+                term_locations.append(index)
+                for atom, negated in term:
+                    literal_atoms.append(atom)
+                    literal_negated.append(negated)
+
+        self.literal_atoms = numpy.array(literal_atoms, dtype=numpy.intp)
+        self.literal_negated = numpy.array(literal_negated, dtype=bool)
+        self.term_starts = numpy.array(term_starts, dtype=numpy.intp)
+        self.term_locations = numpy.array(term_locations, dtype=numpy.intp)
+
+        self.atom_counters = numpy.array([counter_index for counter_index, _ in self.atoms], dtype=numpy.intp)
+        self.atom_thresholds = numpy.array([count for _, count in self.atoms], dtype=numpy.int64)
+        self.numpy_location_regions = numpy.array(self.location_regions, dtype=numpy.intp)
+
+    def evaluate(self, state: CollectionState) -> list[bool]:
+        """Returns whether each location of self.locations can be reached with this state"""
+        prog_items = state.prog_items[self.player]
+        counts = [prog_items[key] for key in self.counter_keys]
+        regions_reachable = [state.can_reach_region(name, self.player) for name in self.region_names]
+
+        if numpy is None:
+            atoms = [counts[counter_index] >= count for counter_index, count in self.atoms]
+            mask = [terms is not None and any(all(atoms[atom] != negated for atom, negated in term) for term in terms)
+                    for terms in self.location_terms]
+            for index in self.fallback_locations:
+                mask[index] = self.locations[index].access_rule(state)
+            return [access and regions_reachable[region] for access, region in zip(mask, self.location_regions)]
+
+        atoms = numpy.array(counts, dtype=numpy.int64)[self.atom_counters] >= self.atom_thresholds
+        mask = self.always_met.copy()
+        if len(self.term_starts):
+            # a literal is unmet when its atom is true and it's negated or the other way around, a term is met when none of its literals are
+            unmet_literals = (atoms[self.literal_atoms] == self.literal_negated).astype(numpy.intp)
+            unmet_per_term = numpy.add.reduceat(unmet_literals, self.term_starts)
+            mask[self.term_locations[unmet_per_term == 0]] = True
+        for index in self.fallback_locations:
+            mask[index] = self.locations[index].access_rule(state)
+        mask &= numpy.array(regions_reachable, dtype=bool)[self.numpy_location_regions]
+        return mask.tolist()
@@ -0,0 +1,40 @@
+# Build the data bundle, the data files already loaded, validated and turned into tables, lookups and parsed requires.
+#
+# Run it from the root of an Archipelago source checkout with this apworld in worlds/, before packing the apworld:
+#   python -m worlds.manual_worldofwarcraftdungeons_chakraa.Bundle
+#
+# The bundle is written to data/bundle.pickle and used instead of the data files as long as they, the hooks and the sources that
+# build the tables don't change. Otherwise the data files are loaded like without it, so rebuild it after every change.
+
+from argparse import ArgumentParser
+from typing import Optional
+import logging
+import os
+
+from . import ManualWorld
+from .DataCache import data_cache
+from .DataValidation import runGenerationDataValidation
+from .Data import location_table
+from .Regions import regionMap
+from .Rules import parse_all_requires
+
+def build_bundle(path: str):
+    # a bundle is trusted to be valid, so refuse to build one from data that isn't
+    runGenerationDataValidation(ManualWorld, force=True)
+
+    trees = parse_all_requires([*location_table, *regionMap.values()])
+    data_cache.write_bundle(path, {"Rules": trees}, validated=True)
+    logging.info(f"Wrote the data bundle with {len(trees)} parsed requires to {path}")
+
+def main(args: Optional[list[str]] = None) -> int:
+    parser = ArgumentParser(description="Build the data bundle of this manual")
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(__file__), *data_cache.bundle_file_name.split("/")),
+                        help="where to write the bundle, data/bundle.pickle by default")
+    parsed = parser.parse_args(args)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    build_bundle(parsed.output)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,6 +2,7 @@ import logging
 
 from .DataValidation import DataValidation, ValidationError
 from .Helpers import load_data_file as helpers_load_data_file
+from .DataCache import data_cache
 
 from .hooks.Data import \
     after_load_game_file, \
@@ -36,26 +37,36 @@ class ManualFile:
         return contents
 
 
-game_table = ManualFile('game.json', dict).load() #dict
-item_table = convert_to_list(ManualFile('items.json', list).load(), 'data') #list
-location_table = convert_to_list(ManualFile('locations.json', list).load(), 'data') #list
-region_table = ManualFile('regions.json', dict).load() #dict
-category_table = ManualFile('categories.json', dict).load() #dict
-option_table = ManualFile('options.json', dict).load() #dict
-meta_table = ManualFile('meta.json', dict).load() #dict
-
-# Removal of schemas in root of tables
-region_table.pop('$schema', '')
-category_table.pop('$schema', '')
-
-# hooks
-game_table = after_load_game_file(game_table)
-item_table = after_load_item_file(item_table)
-location_table = after_load_location_file(location_table)
-region_table = after_load_region_file(region_table)
-category_table = after_load_category_file(category_table)
-option_table = after_load_option_file(option_table)
-meta_table = after_load_meta_file(meta_table)
+if data_cache.loaded:
+    cached_tables = data_cache.tables["Data"]
+    game_table = cached_tables["game_table"]
+    item_table = cached_tables["item_table"]
+    location_table = cached_tables["location_table"]
+    region_table = cached_tables["region_table"]
+    category_table = cached_tables["category_table"]
+    option_table = cached_tables["option_table"]
+    meta_table = cached_tables["meta_table"]
+else:
+    game_table = ManualFile('game.json', dict).load() #dict
+    item_table = convert_to_list(ManualFile('items.json', list).load(), 'data') #list
+    location_table = convert_to_list(ManualFile('locations.json', list).load(), 'data') #list
+    region_table = ManualFile('regions.json', dict).load() #dict
+    category_table = ManualFile('categories.json', dict).load() #dict
+    option_table = ManualFile('options.json', dict).load() #dict
+    meta_table = ManualFile('meta.json', dict).load() #dict
+
+    # Removal of schemas in root of tables
+    region_table.pop('$schema', '')
+    category_table.pop('$schema', '')
+
+    # hooks
+    game_table = after_load_game_file(game_table)
+    item_table = after_load_item_file(item_table)
+    location_table = after_load_location_file(location_table)
+    region_table = after_load_region_file(region_table)
+    category_table = after_load_category_file(category_table)
+    option_table = after_load_option_file(option_table)
+    meta_table = after_load_meta_file(meta_table)
 
 # seed all of the tables for validation
 DataValidation.game_table = game_table
@@ -76,6 +87,18 @@ try: DataValidation.checkForLocationsBeingInvalidJSON()
 except ValidationError as e: validation_errors.append(e)
 
 
+# only cache the tables once they loaded fine
+if not data_cache.loaded and not validation_errors:
+    data_cache.tables["Data"] = {
+        "game_table": game_table,
+        "item_table": item_table,
+        "location_table": location_table,
+        "region_table": region_table,
+        "category_table": category_table,
+        "option_table": option_table,
+        "meta_table": meta_table,
+    }
+
 ############
 # If there are any validation errors, display all of them at once
 ############
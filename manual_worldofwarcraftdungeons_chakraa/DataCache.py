@@ -0,0 +1,178 @@
+import hashlib
+import logging
+import os
+import pickle
+import pkgutil
+from typing import Any, Optional
+
+import Utils
+
+from . import hooks
+from .Helpers import get_data_bytes, DATA_DIRECTORY_ENVIRONMENT_VARIABLE
+
+# The data files Data.py loads
+data_file_names = ["game.json", "items.json", "locations.json", "regions.json", "categories.json", "options.json", "meta.json"]
+
+# The modules that turn the data files into tables and lookups and Rules.py that parses the requires of a bundle, the hooks are added to these
+source_file_names = ["Data.py", "Items.py", "Locations.py", "Game.py", "Helpers.py", "DataCache.py", "Rules.py"]
+
+# Fixed so a bundle built with one python version loads in the others
+pickle_protocol = 4
+
+class DataCache:
+    """Keep the tables of Data.py and the lookups Items.py and Locations.py build from them in a pickle in the user cache directory,
+    keyed by a hash of the data files and of the sources that build them, hooks included.
+    The cache files are named after the data directory too, so switching between them doesn't throw the cache of the others away.\n
+    Each module puts its part in tables when it builds it, a dict of its lookups by variable name, and takes it back from there on a warm import.
+    A bundle built by Bundle.py in data/ is used first when its hash matches, it also has the parsed requires for Rules.py.\n
+    Set the MANUAL_DATA_CACHE environment variable to 0 to turn both off, eg. for hooks whose result isn't only based on the data."""
+
+    environment_variable = "MANUAL_DATA_CACHE"
+    parts = ("Data", "Items", "Locations")
+    """The modules whose tables are saved, it's only saved once all of them put theirs in"""
+
+    bundle_file_name = "data/bundle.pickle"
+
+    def __init__(self, package: str):
+        self.package = package
+        self.enabled = os.environ.get(self.environment_variable, "").strip() != "0"
+        self.tables: dict[str, Any] = {}
+        self.loaded = False
+        self.from_bundle = False
+        self.hash: Optional[str] = None
+        self.path: Optional[str] = None
+        self.bundle_validation: Optional[str] = None
+        self.file_prefix = self.get_file_prefix()
+
+        if self.enabled:
+            try:
+                self.hash = self.get_hash()
+                self.load_bundle()
+                if not self.loaded:
+                    self.path = Utils.cache_path("manual", f"{self.file_prefix}{self.hash}.pickle")
+                    self.load()
+            except Exception as ex:
+                logging.debug(f"Could not use the data cache of {self.package}: {ex}")
+
+    def get_file_prefix(self) -> str:
+        """The start of the names of the cache files of this package and data directory, the outdated ones are found by it"""
+        data_directory = os.environ.get(DATA_DIRECTORY_ENVIRONMENT_VARIABLE)
+        directory_key = hashlib.sha256(os.path.abspath(data_directory).encode()).hexdigest()[:12] if data_directory else "data"
+        return f"{self.package.rsplit('.', 1)[-1]}-{directory_key}-"
+
+    def get_hash(self) -> str:
+        digest = hashlib.sha256(f"{pickle_protocol}".encode())
+        for file_name in data_file_names:
+            try:
+                data = get_data_bytes(file_name)
+            except OSError:
+                data = None
+            digest.update(f"\0data/{file_name}\0".encode())
+            digest.update(data or b"")
+
+        hook_file_names = [f"hooks/{module.name}.py" for module in pkgutil.iter_modules(hooks.__path__)]
+        for file_name in source_file_names + sorted(hook_file_names):
+            digest.update(f"\0{file_name}\0".encode())
+            digest.update(pkgutil.get_data(self.package, file_name) or b"")
+        return digest.hexdigest()
+
+    def load_bundle(self):
+        try:
+            data = pkgutil.get_data(self.package, self.bundle_file_name)
+        except OSError:
+            data = None
+        if data is None:
+            return # no bundle
+
+        bundle = pickle.loads(data)
+        if bundle.get("hash") != self.hash:
+            logging.debug(f"The data bundle of {self.package} is outdated, the data files are loaded instead")
+            return
+
+        tables = bundle["tables"]
+        if all(part in tables for part in self.parts):
+            self.tables = tables
+            self.loaded = True
+            self.from_bundle = True
+            self.bundle_validation = bundle.get("validation")
+
+    def write_bundle(self, path: str, extra_tables: dict[str, Any], validated: bool = False):
+        """Write the tables and extra_tables as a bundle for the current data files, validated when the generation validation passed"""
+        if self.hash is None or not all(part in self.tables for part in self.parts):
+            raise ValueError("The data tables weren't all built, is the data cache turned off?")
+
+        bundle = {"hash": self.hash, "tables": {**self.tables, **extra_tables}, "validation": self.get_validation_hash() if validated else None}
+        with open(path, "wb") as file:
+            pickle.dump(bundle, file, protocol=pickle_protocol)
+
+    def get_validation_hash(self) -> Optional[str]:
+        """The hash of the data, hooks and DataValidation.py, the generation validation is only run again when it changes"""
+        if self.hash is None:
+            return None
+        digest = hashlib.sha256(self.hash.encode())
+        digest.update(pkgutil.get_data(self.package, "DataValidation.py") or b"")
+        return digest.hexdigest()
+
+    def get_validation_path(self, validation_hash: str) -> str:
+        return Utils.cache_path("manual", f"{self.file_prefix}{validation_hash}.validated")
+
+    def is_validated(self) -> bool:
+        """Did the generation validation already pass for this data, in the bundle or in an earlier generation"""
+        try:
+            validation_hash = self.get_validation_hash()
+            if validation_hash is None:
+                return False
+            return validation_hash == self.bundle_validation or os.path.isfile(self.get_validation_path(validation_hash))
+        except Exception as ex:
+            logging.debug(f"Could not check if the data of {self.package} is validated: {ex}")
+            return False
+
+    def record_validation(self):
+        """Remember the generation validation passed for this data, and forget the data it passed for before"""
+        try:
+            validation_hash = self.get_validation_hash()
+            if validation_hash is None:
+                return
+            path = self.get_validation_path(validation_hash)
+            directory = os.path.dirname(path)
+            os.makedirs(directory, exist_ok=True)
+            open(path, "wb").close()
+
+            for file_name in os.listdir(directory):
+                other_path = os.path.join(directory, file_name)
+                if file_name.startswith(self.file_prefix) and file_name.endswith(".validated") and other_path != path:
+                    os.remove(other_path)
+        except Exception as ex:
+            logging.debug(f"Could not record the validation of the data of {self.package}: {ex}")
+
+    def load(self):
+        if self.path is None or not os.path.isfile(self.path):
+            return
+
+        with open(self.path, "rb") as file:
+            tables = pickle.load(file)
+        if all(part in tables for part in self.parts):
+            self.tables = tables
+            self.loaded = True
+
+    def save(self):
+        """Write the tables to the cache if they weren't loaded from it and every part is there, and remove the outdated ones"""
+        if not self.enabled or self.loaded or self.path is None or not all(part in self.tables for part in self.parts):
+            return
+
+        try:
+            directory = os.path.dirname(self.path)
+            os.makedirs(directory, exist_ok=True)
+            temporary_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temporary_path, "wb") as file:
+                pickle.dump(self.tables, file, protocol=pickle_protocol)
+            os.replace(temporary_path, self.path)
+
+            for file_name in os.listdir(directory):
+                path = os.path.join(directory, file_name)
+                if file_name.startswith(self.file_prefix) and file_name.endswith(".pickle") and path != self.path:
+                    os.remove(path)
+        except Exception as ex:
+            logging.debug(f"Could not save the data cache of {self.package}: {ex}")
+
+data_cache = DataCache(__name__.rsplit(".", 1)[0])
@@ -1,183 +1,201 @@
 import logging
+import os
 import re
 import json
+from collections import Counter
+from typing import Any, Iterator, Optional
 from worlds.AutoWorld import World
 from BaseClasses import MultiWorld, ItemClassification
+from .DataCache import data_cache
+
+# Set to anything but empty or 0 to run the generation validation even when it already passed for the same data
+FORCE_VALIDATION_ENVIRONMENT_VARIABLE = "MANUAL_FORCE_VALIDATION"
 
 
 class ValidationError(Exception):
     pass
 
-class DataValidation():
-    game_table = {}
-    item_table = []
-    location_table = []
-    region_table = {}
-
+def get_requirement_references(requires: str | list) -> Iterator[tuple[str, str]]:
+    """The ("item" or "category", name) of every item and category written in a requires, in order, names kept as written"""
+    if isinstance(requires, str):
+        for item in re.findall(r'\|[^|]+\|', requires):
+            item_name = item.replace("|", "").split(":")[0]
+            if '@' in item:
+                yield "category", item_name[1:]
+            else:
+                yield "item", item_name
+        return
+
+    # item access is in dict form
+    for item in requires:
+        # if the require entry is an object with "or" or a list of items, treat it as a standalone require of its own
+        if (isinstance(item, dict) and "or" in item and isinstance(item["or"], list)) or (isinstance(item, list)):
+            or_items = item["or"] if isinstance(item, dict) else item
+            for or_item in or_items:
+                yield "item", or_item.split(":")[0]
+        else:
+            yield "item", item.split(":")[0]
+
+# The (value name, count) of every {ItemValue(value:count)} of a requires
+ItemValueDemands = tuple[tuple[str, int], ...]
+
+def get_item_value_demands(requires: str | list) -> ItemValueDemands:
+    """Read the ItemValue requirements of a requires from its parsed tree, the value names lowercased.\n
+    Requires in dict form, and ItemValue calls the tree doesn't have as nodes (eg. in the arguments of another function),
+    are searched in the json of the requires like the pre-fill check used to."""
+    from .Rules import parse_requires_string, iterate_nodes, normalize_requires
+
+    values_requested = {}
+    if isinstance(requires, str):
+        try:
+            tree = parse_requires_string(normalize_requires(requires), {"name": "", "requires": requires})
+            nodes = [node for node in iterate_nodes(tree) if node[0] == "function" and node[1] == "ItemValue"]
+        except Exception:
+            nodes = None
+
+        if nodes is not None and len(nodes) == requires.count("{ItemValue("):
+            demands = []
+            for _, _, args in nodes:
+                value, separator, count = args.partition(":")
+                if separator:
+                    demands.append((value.lower().strip(), int(count.split(",")[0])))
+            DataValidation._addItemValueDemands(values_requested, demands)
+            return tuple(values_requested.items())
+
+    DataValidation._checkLocationRequiresForItemValueWithRegex(values_requested, json.dumps(requires))
+    return tuple(values_requested.items())
+
+class ValidationIndex:
+    """The item names, item categories and region names of the tables, and every item and category their requires refer to,
+    collected in one pass so the checks only do set lookups"""
+
+    def __init__(self, item_table: list, location_table: list, region_table: dict):
+        self.item_names: set[str] = {item["name"] for item in item_table}
+        self.item_categories: set[str] = {category for item in item_table for category in item.get("category", [])}
+        self.region_table = region_table
+        self.region_names: set[str] = set(region_table)
+        self.connected_regions: set[str] = {name for region in region_table.values() for name in region.get("connects_to", None) or ()}
+
+        # (location or region name, "item" or "category", name)
+        self.location_references: list[tuple[str, str, str]] = []
+        self.region_references: list[tuple[str, str, str]] = []
+        # every text found between two | of the json of a requires, with the first location or region it's found in
+        self.location_pipe_texts: dict[str, str] = {}
+        self.region_pipe_texts: dict[str, str] = {}
+        self.location_requires: list[tuple[str, Any]] = []
+        self.region_requires: list[tuple[str, Any]] = []
+
+        for location in location_table:
+            if "requires" in location:
+                self.add_requires(location["name"], location["requires"], self.location_references, self.location_pipe_texts, self.location_requires)
+
+        for region_name, region in region_table.items():
+            if "requires" in region:
+                self.add_requires(region_name, region["requires"], self.region_references, self.region_pipe_texts, self.region_requires)
 
     @staticmethod
-    def checkItemNamesInLocationRequires():
-        for location in DataValidation.location_table:
-            if "requires" not in location:
-                continue
-
-            if isinstance(location["requires"], str):
-                # parse user written statement into list of each item
-                for item in re.findall(r'\|[^|]+\|', location["requires"]):
-                    if item.lower() == "or" or item.lower() == "and" or item == ")" or item == "(":
-                        continue
-                    else:
-                        # if it's a category, validate that the category exists
-                        if '@' in item:
-                            item = item.replace("|", "")
-                            item_parts = item.split(":")
-                            item_name = item
-
-                            if len(item_parts) > 1:
-                                item_name = item_parts[0]
-
-                            item_name = item_name[1:]
-                            item_category_exists = len([item for item in DataValidation.item_table if item_name in item.get('category', [])]) > 0
-
-                            if not item_category_exists:
-                                raise ValidationError("Item category %s is required by location %s but is misspelled or does not exist." % (item_name, location["name"]))
-
-                            continue
-
-                        item = item.replace("|", "")
-
-                        item_parts = item.split(":")
-                        item_name = item
-
-                        if len(item_parts) > 1:
-                            item_name = item_parts[0]
-
-                        item_exists = len([item["name"] for item in DataValidation.item_table if item["name"] == item_name]) > 0
+    def add_requires(area_name: str, requires: Any, references: list, pipe_texts: dict[str, str], requires_list: list):
+        references.extend((area_name, require_type, name) for require_type, name in get_requirement_references(requires))
 
-                        if not item_exists:
-                            raise ValidationError("Item %s is required by location %s but is misspelled or does not exist." % (item_name, location["name"]))
+        # like searching the json for "|item name|", which also finds names between two items like |A|B|C|
+        for text in json.dumps(requires).split("|")[1:-1]:
+            pipe_texts.setdefault(text, area_name)
+        requires_list.append((area_name, requires))
 
-            else:  # item access is in dict form
-                for item in location["requires"]:
-                    # if the require entry is an object with "or" or a list of items, treat it as a standalone require of its own
-                    if (isinstance(item, dict) and "or" in item and isinstance(item["or"], list)) or (isinstance(item, list)):
-                        or_items = item
-
-                        if isinstance(item, dict):
-                            or_items = item["or"]
+    @staticmethod
+    def find_requiring(item_name: str, pipe_texts: dict[str, str], requires_list: list[tuple[str, Any]]) -> Optional[str]:
+        if "|" not in item_name:
+            return pipe_texts.get(item_name)
+        # a name with a | in it can't be split around, search the json like it used to
+        return next((area_name for area_name, requires in requires_list if '|{}|'.format(item_name) in json.dumps(requires)), None)
+
+    def get_item_value_demands(self) -> tuple[dict[str, ItemValueDemands], dict[str, ItemValueDemands], dict[str, dict[str, ItemValueDemands]], dict[str, dict[str, ItemValueDemands]]]:
+        """The ItemValue requirements of the locations, the regions, and the entrances and exits of the regions (by the region they
+        connect with), only for the ones that have any. Built from the parsed requires on first use."""
+        if not hasattr(self, 'item_value_demands'):
+            location_demands = {}
+            for location_name, requires in self.location_requires:
+                if requires and (demands := get_item_value_demands(requires)):
+                    location_demands[location_name] = demands
+
+            region_demands = {}
+            for region_name, requires in self.region_requires:
+                if requires and (demands := get_item_value_demands(requires)):
+                    region_demands[region_name] = demands
+
+            entrance_demands = {}
+            exit_demands = {}
+            for region_name, region in self.region_table.items():
+                for key, connection_demands in (("entrance_requires", entrance_demands), ("exit_requires", exit_demands)):
+                    for connected_region, requires in region.get(key, {}).items():
+                        if demands := get_item_value_demands(requires):
+                            connection_demands.setdefault(region_name, {})[connected_region] = demands
+
+            self.item_value_demands = (location_demands, region_demands, entrance_demands, exit_demands)
+        return self.item_value_demands
+
+    def find_location_requiring(self, item_name: str) -> Optional[str]:
+        """The first location whose requires has |item_name| in it, if any"""
+        return self.find_requiring(item_name, self.location_pipe_texts, self.location_requires)
+
+    def find_region_requiring(self, item_name: str) -> Optional[str]:
+        """The first region whose requires has |item_name| in it, if any"""
+        return self.find_requiring(item_name, self.region_pipe_texts, self.region_requires)
 
-                        for or_item in or_items:
-                            or_item_parts = or_item.split(":")
-                            or_item_name = or_item
+class DataValidation():
+    game_table = {}
+    item_table = []
+    location_table = []
+    region_table = {}
 
-                            if len(or_item_parts) > 1:
-                                or_item_name = or_item_parts[0]
 
-                            item_exists = len([item["name"] for item in DataValidation.item_table if item["name"] == or_item_name]) > 0
+    index: Optional[ValidationIndex] = None
 
-                            if not item_exists:
-                                raise ValidationError("Item %s is required by location %s but is misspelled or does not exist." % (or_item_name, location["name"]))
-                    else:
-                        item_parts = item.split(":")
-                        item_name = item
+    @staticmethod
+    def get_index() -> ValidationIndex:
+        """The names and requirement references of the tables, built on first use, see reset_index"""
+        if DataValidation.index is None:
+            DataValidation.index = ValidationIndex(DataValidation.item_table, DataValidation.location_table, DataValidation.region_table)
+        return DataValidation.index
 
-                        if len(item_parts) > 1:
-                            item_name = item_parts[0]
+    @staticmethod
+    def reset_index():
+        """Forget the index so the next check rebuilds it, for when the tables changed"""
+        DataValidation.index = None
 
-                        item_exists = len([item["name"] for item in DataValidation.item_table if item["name"] == item_name]) > 0
+    @staticmethod
+    def checkItemNamesInLocationRequires():
+        index = DataValidation.get_index()
+        for location_name, require_type, name in index.location_references:
+            if require_type == "category" and name not in index.item_categories:
+                raise ValidationError("Item category %s is required by location %s but is misspelled or does not exist." % (name, location_name))
 
-                        if not item_exists:
-                            raise ValidationError("Item %s is required by location %s but is misspelled or does not exist." % (item_name, location["name"]))
+            if require_type == "item" and name not in index.item_names:
+                raise ValidationError("Item %s is required by location %s but is misspelled or does not exist." % (name, location_name))
 
     @staticmethod
     def checkItemNamesInRegionRequires():
-        for region_name in DataValidation.region_table:
-            region = DataValidation.region_table[region_name]
-
-            if "requires" not in region:
-                continue
-
-            if isinstance(region["requires"], str):
-                # parse user written statement into list of each item
-                for item in re.findall(r'\|[^|]+\|', region["requires"]):
-                    if item.lower() == "or" or item.lower() == "and" or item == ")" or item == "(":
-                        continue
-                    else:
-                        # if it's a category, validate that the category exists
-                        if '@' in item:
-                            item = item.replace("|", "")
-                            item_parts = item.split(":")
-                            item_name = item
-
-                            if len(item_parts) > 1:
-                                item_name = item_parts[0]
-
-                            item_name = item_name[1:]
-                            item_category_exists = len([item for item in DataValidation.item_table if item_name in item.get('category', [])]) > 0
+        index = DataValidation.get_index()
+        for region_name, require_type, name in index.region_references:
+            if require_type == "category" and name not in index.item_categories:
+                raise ValidationError("Item category %s is required by region %s but is misspelled or does not exist." % (name, region_name))
 
-                            if not item_category_exists:
-                                raise ValidationError("Item category %s is required by region %s but is misspelled or does not exist." % (item_name, region_name))
-
-                            continue
-
-                        item = item.replace("|", "")
-
-                        item_parts = item.split(":")
-                        item_name = item
-
-                        if len(item_parts) > 1:
-                            item_name = item_parts[0]
-
-                        item_exists = len([item["name"] for item in DataValidation.item_table if item["name"] == item_name]) > 0
-
-                        if not item_exists:
-                            raise ValidationError("Item %s is required by region %s but is misspelled or does not exist." % (item_name, region_name))
-
-            else:  # item access is in dict form
-                for item in region["requires"]:
-                    # if the require entry is an object with "or" or a list of items, treat it as a standalone require of its own
-                    if (isinstance(item, dict) and "or" in item and isinstance(item["or"], list)) or (isinstance(item, list)):
-                        or_items = item
-
-                        if isinstance(item, dict):
-                            or_items = item["or"]
-
-                        for or_item in or_items:
-                            or_item_parts = or_item.split(":")
-                            or_item_name = or_item
-
-                            if len(or_item_parts) > 1:
-                                or_item_name = or_item_parts[0]
-
-                            item_exists = len([item["name"] for item in DataValidation.item_table if item["name"] == or_item_name]) > 0
-
-                            if not item_exists:
-                                raise ValidationError("Item %s is required by region %s but is misspelled or does not exist." % (or_item_name, region_name))
-                    else:
-                        item_parts = item.split(":")
-                        item_name = item
-
-                        if len(item_parts) > 1:
-                            item_name = item_parts[0]
-
-                        item_exists = len([item["name"] for item in DataValidation.item_table if item["name"] == item_name]) > 0
-
-                        if not item_exists:
-                            raise ValidationError("Item %s is required by region %s but is misspelled or does not exist." % (item_name, region_name))
+            if require_type == "item" and name not in index.item_names:
+                raise ValidationError("Item %s is required by region %s but is misspelled or does not exist." % (name, region_name))
 
     @staticmethod
     def checkRegionNamesInLocations():
+        index = DataValidation.get_index()
         for location in DataValidation.location_table:
             if "region" not in location or location["region"] in ["Menu", "Manual"]:
                 continue
 
-            region_exists = len([name for name in DataValidation.region_table if name == location["region"]]) > 0
-
-            if not region_exists:
+            if location["region"] not in index.region_names:
                 raise ValidationError("Region %s is set for location %s, but the region is misspelled or does not exist." % (location["region"], location["name"]))
 
     @staticmethod
     def checkItemsThatShouldBeRequired():
+        index = DataValidation.get_index()
         for item in DataValidation.item_table:
             # if the item is already progression, no need to check
             if "progression" in item and item["progression"]:
@@ -187,39 +205,13 @@ class DataValidation():
             if "progression_skip_balancing" in item and item["progression_skip_balancing"]:
                 continue
 
-            # check location requires for the presence of item name
-            for location in DataValidation.location_table:
-                if "requires" not in location:
-                    continue
-
-                # convert to json so we don't have to guess the data type
-                location_requires = json.dumps(location["requires"])
-
-                # if boolean, else legacy
-                if isinstance(location_requires, str):
-                    if '|{}|'.format(item["name"]) in location_requires:
-                        raise ValidationError("Item %s is required by location %s, but the item is not marked as progression." % (item["name"], location["name"]))
-                else:
-                    if item["name"] in location_requires:
-                        raise ValidationError("Item %s is required by location %s, but the item is not marked as progression." % (item["name"], location["name"]))
-
-            # check region requires for the presence of item name
-            for region_name in DataValidation.region_table:
-                region = DataValidation.region_table[region_name]
-
-                if "requires" not in region:
-                    continue
+            location_name = index.find_location_requiring(item["name"])
+            if location_name is not None:
+                raise ValidationError("Item %s is required by location %s, but the item is not marked as progression." % (item["name"], location_name))
 
-                # convert to json so we don't have to guess the data type
-                region_requires = json.dumps(region["requires"])
-
-                # if boolean, else legacy
-                if isinstance(region_requires, str):
-                    if '|{}|'.format(item["name"]) in region_requires:
-                        raise ValidationError("Item %s is required by region %s, but the item is not marked as progression." % (item["name"], region_name))
-                else:
-                    if item["name"] in region_requires:
-                        raise ValidationError("Item %s is required by region %s, but the item is not marked as progression." % (item["name"], region_name))
+            region_name = index.find_region_requiring(item["name"])
+            if region_name is not None:
+                raise ValidationError("Item %s is required by region %s, but the item is not marked as progression." % (item["name"], region_name))
 
     @staticmethod
     def _checkLocationRequiresForItemValueWithRegex(values_requested: dict[str, int], requires) -> dict[str, int]:
@@ -233,12 +225,28 @@ class DataValidation():
                     values_requested[value] = max(values_requested[value], count)
         return values_requested
 
+    @staticmethod
+    def _addItemValueDemands(values_requested: dict[str, int], demands: ItemValueDemands) -> dict[str, int]:
+        """Keep the highest count requested of each value, like _checkLocationRequiresForItemValueWithRegex"""
+        for value, count in demands:
+            if not values_requested.get(value):
+                values_requested[value] = count
+            else:
+                values_requested[value] = max(values_requested[value], count)
+        return values_requested
 
     @staticmethod
     def preFillCheckIfEnoughItemsForValue(world: World, multiworld: MultiWorld):
         from .Helpers import get_items_with_value, get_items_for_player, filter_used_regions
         player = world.player
         values_requested = {}
+        item_value_demands = DataValidation.get_index().get_item_value_demands()
+
+        # nothing requires any value, no need to look for the regions in use
+        if not any(item_value_demands):
+            return
+
+        location_demands, region_demands, entrance_demands, exit_demands = item_value_demands
         player_regions = []
 
         #Grab all the player's regions
@@ -252,23 +260,18 @@ class DataValidation():
 
         #Check used regions (and their parent(s)) for ItemValue requirement
         for region in used_regions:
-            manualregion = DataValidation.region_table.get(region.name, {})
-            if manualregion:
-                if manualregion.get("requires"):
-                    DataValidation._checkLocationRequiresForItemValueWithRegex(values_requested, json.dumps(manualregion["requires"]))
+            DataValidation._addItemValueDemands(values_requested, region_demands.get(region.name, ()))
 
-                for region_entrance, require in manualregion.get('entrance_requires', {}).items():
-                    if region_entrance in used_regions_names:
-                        DataValidation._checkLocationRequiresForItemValueWithRegex(values_requested, json.dumps(require))
+            for region_entrance, demands in entrance_demands.get(region.name, {}).items():
+                if region_entrance in used_regions_names:
+                    DataValidation._addItemValueDemands(values_requested, demands)
 
-                for region_exit, require in manualregion.get('exit_requires', {}).items():
-                    if region_exit in used_regions_names:
-                        DataValidation._checkLocationRequiresForItemValueWithRegex(values_requested, json.dumps(require))
+            for region_exit, demands in exit_demands.get(region.name, {}).items():
+                if region_exit in used_regions_names:
+                    DataValidation._addItemValueDemands(values_requested, demands)
 
             for location in region.locations:
-                manualLocation = world.location_name_to_location.get(location.name, {})
-                if "requires" in manualLocation and manualLocation["requires"]:
-                    DataValidation._checkLocationRequiresForItemValueWithRegex(values_requested, json.dumps(manualLocation["requires"]))
+                DataValidation._addItemValueDemands(values_requested, location_demands.get(location.name, ()))
 
         # compare whats available vs requested but only if there's anything requested
         if values_requested:
@@ -297,25 +300,21 @@ class DataValidation():
                 continue
 
             for connecting_region in region["connects_to"]:
-                region_exists = len([name for name in DataValidation.region_table if name == connecting_region]) > 0
-
-                if not region_exists:
+                if connecting_region not in DataValidation.get_index().region_names:
                     raise ValidationError("Region %s connects to a region %s, which is misspelled or does not exist." % (region_name, connecting_region))
 
     @staticmethod
     def checkForDuplicateItemNames():
+        name_counts = Counter(item["name"] for item in DataValidation.item_table)
         for item in DataValidation.item_table:
-            name_count = len([i for i in DataValidation.item_table if i["name"] == item["name"]])
-
-            if name_count > 1:
+            if name_counts[item["name"]] > 1:
                 raise ValidationError("Item %s is defined more than once." % (item["name"]))
 
     @staticmethod
     def checkForDuplicateLocationNames():
+        name_counts = Counter(location["name"] for location in DataValidation.location_table)
         for location in DataValidation.location_table:
-            name_count = len([l for l in DataValidation.location_table if l["name"] == location["name"]])
-
-            if name_count > 1:
+            if name_counts[location["name"]] > 1:
                 raise ValidationError("Location %s is defined more than once." % (location["name"]))
 
     @staticmethod
@@ -340,12 +339,12 @@ class DataValidation():
 
             if "items" in starting_block:
                 for item_name in starting_block["items"]:
-                    if not item_name in [item["name"] for item in DataValidation.item_table]:
+                    if not item_name in DataValidation.get_index().item_names:
                         raise ValidationError("Item %s is set as a starting item, but is misspelled or is not defined." % (item_name))
 
             if "item_categories" in starting_block:
                 for category_name in starting_block["item_categories"]:
-                    if len([item for item in DataValidation.item_table if "category" in item and category_name in item["category"]]) == 0:
+                    if category_name not in DataValidation.get_index().item_categories:
                         raise ValidationError("Item category %s is set as a starting item category, but is misspelled or is not defined on any items." % (category_name))
 
     @staticmethod
@@ -389,7 +388,7 @@ class DataValidation():
                 continue
 
             for item_name in place_item:
-                if not item_name in [item["name"] for item in DataValidation.item_table]:
+                if not item_name in DataValidation.get_index().item_names:
                     raise ValidationError("Item %s is placed (using place_item) on a location, but is misspelled or is not defined." % (item_name))
 
     @staticmethod
@@ -403,7 +402,7 @@ class DataValidation():
                 continue
 
             for category_name in place_item_category:
-                if len([item for item in DataValidation.item_table if "category" in item and category_name in item["category"]]) == 0:
+                if category_name not in DataValidation.get_index().item_categories:
                     raise ValidationError("Item category %s is placed (using place_item_category) on a location, but is misspelled or is not defined." % (category_name))
 
     @staticmethod
@@ -431,9 +430,7 @@ class DataValidation():
         nonstarting_regions = [region for region in DataValidation.region_table if not DataValidation.region_table[region].get("starting")]
 
         for nonstarter in nonstarting_regions:
-            regions_that_connect_to = [region for region in DataValidation.region_table if "connects_to" in DataValidation.region_table[region] and nonstarter in DataValidation.region_table[region]["connects_to"]]
-
-            if len(regions_that_connect_to) == 0:
+            if nonstarter not in DataValidation.get_index().connected_regions:
                 raise ValidationError("The region '%s' is set as a non-starting region, but has no regions that connect to it. It will be inaccessible." % nonstarter)
 
 
@@ -450,7 +447,13 @@ def runPreFillDataValidation(world: World, multiworld: MultiWorld):
         raise Exception(f"\n\n{heading} \n\n{newline.join([' - ' + str(validation_error) for validation_error in validation_errors])}\n\n")
 
 # Called during stage_assert_generate
-def runGenerationDataValidation(cls) -> None:
+def runGenerationDataValidation(cls, force: bool = False) -> None:
+    force = force or getattr(cls, "force_data_validation", False) or os.environ.get(FORCE_VALIDATION_ENVIRONMENT_VARIABLE, "").strip() not in ("", "0")
+    if not force and data_cache.is_validated():
+        logging.debug(f"Skipped the data validation of {cls.game}, it already passed for the same data and hooks")
+        return
+
+    DataValidation.reset_index()
     validation_errors = []
 
     # check that requires have correct item names in locations and regions
@@ -509,3 +512,5 @@ def runGenerationDataValidation(cls) -> None:
         heading = f"ValidationError(s) in {cls.game}:";
 
         raise Exception("\n\n%s \n\n%s\n\n" % (heading, "\n".join([' - ' + str(validation_error) for validation_error in validation_errors])))
+
+    data_cache.record_validation()
@@ -15,22 +15,32 @@ if TYPE_CHECKING:
     from .Items import ManualItem
     from .Locations import ManualLocation
 
+# A folder to load the data files from instead of data/, eg. the synthetic manuals written by benchmarks/Fixtures.py.
+# It has to be set before the world is imported, the files it doesn't have are still loaded from data/
+DATA_DIRECTORY_ENVIRONMENT_VARIABLE = "MANUAL_DATA_DIR"
+
+def get_data_bytes(*args) -> bytes:
+    data_directory = os.environ.get(DATA_DIRECTORY_ENVIRONMENT_VARIABLE)
+    if data_directory:
+        path = os.path.join(data_directory, *args)
+        if os.path.isfile(path):
+            with open(path, "rb") as file:
+                return file.read()
+
+    return pkgutil.get_data(__name__, "/".join(["data", *args]))
+
 # blatantly copied from the minecraft ap world because why not
 def load_data_file(*args) -> dict:
-    fname = "/".join(["data", *args])
-
     try:
-        filedata = json.loads(pkgutil.get_data(__name__, fname).decode())
+        filedata = json.loads(get_data_bytes(*args).decode())
     except:
         filedata = []
 
     return filedata
 
 def load_data_csv(*args) -> list[dict]:
-    fname = "/".join(["data", *args])
-
     try:
-        lines = pkgutil.get_data(__name__, fname).decode().splitlines()
+        lines = get_data_bytes(*args).decode().splitlines()
     except:
         lines = []
     filedata = list(csv.DictReader(lines))
@@ -218,6 +228,7 @@ def format_to_valid_identifier(input: str) -> str:
 class ProgItemsCat(IntEnum):
     VALUE = 1
     CATEGORY = 2
+    RULE = 3
 
 def format_state_prog_items_key(category: str|ProgItemsCat ,key: str) -> str:
     """Convert the inputted key to the format used in state.has(key) to check/set the count of an item_value.
@@ -316,3 +327,11 @@ def convert_string_to_type(input: str, target_type: type) -> Any:
 
     newline = "\n"
     raise Exception(f"'{value}' could not be converted to {target_type}, here's the conversion failure message(s):\n\n{newline.join([' - ' + str(validation_error) for validation_error in errors])}\n\n")
+
+def _empty_function(*args, **kwargs):
+    pass
+
+def is_empty_function(func) -> bool:
+    """Is this function left empty, like the hooks of hooks/World.py are until a manual fills them in"""
+    code = getattr(func, "__code__", None)
+    return code is not None and code.co_code == _empty_function.__code__.co_code and not code.co_names
@@ -1,6 +1,9 @@
+from typing import Iterable
 from BaseClasses import Item
 from .Data import item_table
+from .DataCache import data_cache
 from .Game import filler_item_name, starting_index
+from .Helpers import format_state_prog_items_key, ProgItemsCat
 
 
 ######################
@@ -11,57 +14,96 @@ item_id_to_name: dict[int, str] = {}
 item_name_to_item: dict[str, dict] = {}
 item_name_groups: dict[str, str] = {}
 advancement_item_names: set[str] = set()
+item_name_to_category_keys: dict[str, tuple[str, ...]] = {} # prog_items keys of the item's categories, counted by ManualWorld.collect/remove
 lastItemId = -1
 
-count = starting_index
-
-# add the filler item to the list of items for lookup
-if filler_item_name:
-    item_table.append({
-        "name": filler_item_name
-    })
-
-# add sequential generated ids to the lists
-for key, val in enumerate(item_table):
-    if "id" in item_table[key]:
-        item_id = item_table[key]["id"]
-        if item_id >= count:
-            count = item_id
-        else:
-            raise ValueError(f"{item_table[key]['name']} has an invalid ID. ID must be at least {count + 1}")
-
-    item_table[key]["id"] = count
-    item_table[key]["progression"] = val["progression"] if "progression" in val else False
-    if isinstance(val.get("category", []), str):
-        item_table[key]["category"] = [val["category"]]
-        
-    count += 1
-
-for item in item_table:
-    item_name = item["name"]
-    item_id_to_name[item["id"]] = item_name
-    item_name_to_item[item_name] = item
-
-    if item["id"] is not None:
-        lastItemId = max(lastItemId, item["id"])
-
-    for c in item.get("category", []):
-        if c not in item_name_groups:
-            item_name_groups[c] = []
-        item_name_groups[c].append(item_name)
-
-    #Just lowercase the values here to remove all the .lower.strip down the line
-    item['value'] = {k.lower().strip(): v
-                     for k, v in item.get('value', {}).items()}
-
-    for v in item.get("value", {}).keys():
-        group_name = f"has_{v}_value"
-        if group_name not in item_name_groups:
-            item_name_groups[group_name] = []
-        item_name_groups[group_name].append(item_name)
-
-item_id_to_name[None] = "__Victory__"
-item_name_to_id = {name: id for id, name in item_id_to_name.items()}
+if data_cache.loaded:
+    cached_tables = data_cache.tables["Items"]
+    item_id_to_name = cached_tables["item_id_to_name"]
+    item_name_to_item = cached_tables["item_name_to_item"]
+    item_name_groups = cached_tables["item_name_groups"]
+    advancement_item_names = cached_tables["advancement_item_names"]
+    item_name_to_category_keys = cached_tables["item_name_to_category_keys"]
+    lastItemId = cached_tables["lastItemId"]
+    item_name_to_id = cached_tables["item_name_to_id"]
+    item_name_to_categories = cached_tables["item_name_to_categories"]
+    category_to_item_names = cached_tables["category_to_item_names"]
+else:
+    count = starting_index
+
+    # add the filler item to the list of items for lookup
+    if filler_item_name:
+        item_table.append({
+            "name": filler_item_name
+        })
+
+    # add sequential generated ids to the lists
+    for key, val in enumerate(item_table):
+        if "id" in item_table[key]:
+            item_id = item_table[key]["id"]
+            if item_id >= count:
+                count = item_id
+            else:
+                raise ValueError(f"{item_table[key]['name']} has an invalid ID. ID must be at least {count + 1}")
+
+        item_table[key]["id"] = count
+        item_table[key]["progression"] = val["progression"] if "progression" in val else False
+        if isinstance(val.get("category", []), str):
+            item_table[key]["category"] = [val["category"]]
+
+        count += 1
+
+    for item in item_table:
+        item_name = item["name"]
+        item_id_to_name[item["id"]] = item_name
+        item_name_to_item[item_name] = item
+
+        if item["id"] is not None:
+            lastItemId = max(lastItemId, item["id"])
+
+        for c in item.get("category", []):
+            if c not in item_name_groups:
+                item_name_groups[c] = []
+            item_name_groups[c].append(item_name)
+
+        item_name_to_category_keys[item_name] = tuple(format_state_prog_items_key(ProgItemsCat.CATEGORY, c) for c in item.get("category", []))
+
+        #Just lowercase the values here to remove all the .lower.strip down the line
+        item['value'] = {k.lower().strip(): v
+                         for k, v in item.get('value', {}).items()}
+
+        for v in item.get("value", {}).keys():
+            group_name = f"has_{v}_value"
+            if group_name not in item_name_groups:
+                item_name_groups[group_name] = []
+            item_name_groups[group_name].append(item_name)
+
+    item_id_to_name[None] = "__Victory__"
+    item_name_to_id = {name: id for id, name in item_id_to_name.items()}
+
+    # Category indexes, so the items of a category never have to be searched for
+    item_name_to_categories: dict[str, frozenset[str]] = {name: frozenset(item.get("category", [])) for name, item in item_name_to_item.items()}
+    category_item_names: dict[str, list[str]] = {}
+    for item_name, item in item_name_to_item.items():
+        for c in item.get("category", []):
+            category_item_names.setdefault(c, []).append(item_name)
+    category_to_item_names: dict[str, tuple[str, ...]] = {c: tuple(names) for c, names in category_item_names.items()}
+
+    data_cache.tables["Items"] = {
+        "item_id_to_name": item_id_to_name,
+        "item_name_to_item": item_name_to_item,
+        "item_name_groups": item_name_groups,
+        "advancement_item_names": advancement_item_names,
+        "item_name_to_category_keys": item_name_to_category_keys,
+        "lastItemId": lastItemId,
+        "item_name_to_id": item_name_to_id,
+        "item_name_to_categories": item_name_to_categories,
+        "category_to_item_names": category_to_item_names,
+    }
+
+def get_item_names_in_categories(categories: Iterable[str]) -> set[str]:
+    """Returns the names of every item that is in at least one of the categories"""
+    return {item_name for c in categories for item_name in category_to_item_names.get(c, ())}
 
 
 ######################
@@ -0,0 +1,208 @@
+from typing import TYPE_CHECKING, Callable, Any, Iterator, Optional, TextIO
+from contextlib import contextmanager, nullcontext
+import cProfile
+import functools
+import logging
+import os
+import pstats
+import time
+import tracemalloc
+
+from BaseClasses import CollectionState
+
+if TYPE_CHECKING:
+    from . import ManualWorld
+
+def is_profiling_enabled(world: "ManualWorld", attribute: str, environment_variable: str) -> bool:
+    """Is a profiling mode turned on, either by the world's attribute or by an environment variable that isn't empty or 0"""
+    return bool(getattr(world, attribute, False)) or os.environ.get(environment_variable, "").strip() not in ("", "0")
+
+class RuleProfiler:
+    """Record the call count, cumulative time and results of the access rules and requirement functions of a player.\n
+    Turned on by ManualWorld.rules_profiling or the MANUAL_RULES_PROFILING environment variable, the report ends up in the spoiler."""
+
+    environment_variable = "MANUAL_RULES_PROFILING"
+
+    def __init__(self):
+        # (kind, name) -> [calls, seconds, true results]
+        # the rules added to the same entrance are told apart by their kind: "region" for the requires of the region it leads to,
+        # "entrance" for the entrance_requires of that region and "exit" for the exit_requires of the region it leaves
+        self.stats: dict[tuple[str, str], list] = {}
+
+    def get_stats(self, kind: str, name: str) -> list:
+        return self.stats.setdefault((kind, name), [0, 0.0, 0])
+
+    def wrap_rule(self, kind: str, name: str, rule: Callable[[CollectionState], bool]) -> Callable[[CollectionState], bool]:
+        stats = self.get_stats(kind, name)
+
+        def profiledRule(state: CollectionState) -> bool:
+            start = time.perf_counter()
+            result = rule(state)
+            stats[1] += time.perf_counter() - start
+            stats[0] += 1
+            if result:
+                stats[2] += 1
+            return result
+
+        return profiledRule
+
+    def call_function(self, func_name: str, func: Callable, func_args: list) -> Any:
+        stats = self.get_stats("function", func_name)
+        start = time.perf_counter()
+        try:
+            return_value = func(*func_args)
+        finally:
+            stats[1] += time.perf_counter() - start
+            stats[0] += 1
+        # functions returning a requires string are neither true nor false
+        if return_value is True:
+            stats[2] += 1
+        return return_value
+
+    def write_report(self, handle: TextIO, title: str):
+        """Write the stats sorted by cumulative time, slowest first"""
+        handle.write(f"\n\nRule profile for {title}:\n\n")
+        handle.write(f"{'Kind':<10} {'Calls':>10} {'Total (ms)':>12} {'Avg (us)':>10} {'True':>7}  Name\n")
+        for (kind, name), (calls, seconds, true_results) in sorted(self.stats.items(), key=lambda stat: stat[1][1], reverse=True):
+            if not calls:
+                continue
+            handle.write(f"{kind:<10} {calls:>10} {seconds * 1000:>12.3f} {seconds * 1000000 / calls:>10.2f} {true_results / calls:>7.1%}  {name}\n")
+
+class StageTimings:
+    """Wall-clock time of the generation stages of a player and of the hooks they call.\n
+    When tracemalloc is tracing the change of the traced memory is recorded too. It's started for the stage timings report,
+    turned on by ManualWorld.stage_timings_report or the MANUAL_STAGE_TIMINGS environment variable, which also puts the timings
+    in the spoiler and summarizes them in the log at the info level instead of the debug one.
+    The memory is only traced while a stage runs, so a stage that raises doesn't leave tracemalloc on for the rest of the process."""
+
+    environment_variable = "MANUAL_STAGE_TIMINGS"
+
+    # how many stage timings want the memory traced, tracemalloc is only stopped by them if they're the ones that started it
+    tracing_users = 0
+    started_tracing = False
+
+    def __init__(self, title: str, report: bool = False):
+        self.title = title
+        self.report = report
+        self.records: list[dict[str, Any]] = []
+        self.current_stages: list[str] = []
+        self.tracing = False
+
+    def start_tracing(self):
+        if StageTimings.tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            StageTimings.started_tracing = True
+        StageTimings.tracing_users += 1
+        self.tracing = True
+
+    def stop_tracing(self):
+        if not self.tracing:
+            return
+        self.tracing = False
+        StageTimings.tracing_users -= 1
+        if StageTimings.tracing_users == 0 and StageTimings.started_tracing:
+            tracemalloc.stop()
+            StageTimings.started_tracing = False
+
+    def finish(self):
+        """Summarize the timings in the log, once the last stage of the player is done"""
+        logging.log(logging.INFO if self.report else logging.DEBUG, self.format_summary())
+
+    @contextmanager
+    def measure(self, name: str) -> Iterator[None]:
+        outermost = not self.current_stages
+        if outermost and self.report:
+            self.start_tracing()
+        tracing = tracemalloc.is_tracing()
+        memory_before = tracemalloc.get_traced_memory()[0] if tracing else 0
+        record: dict[str, Any] = {"name": name, "stage": self.current_stages[-1] if self.current_stages else None, "start": time.perf_counter()}
+        self.current_stages.append(name)
+        try:
+            yield
+        finally:
+            self.current_stages.pop()
+            record["seconds"] = time.perf_counter() - record["start"]
+            record["memory_delta"] = tracemalloc.get_traced_memory()[0] - memory_before if tracing and tracemalloc.is_tracing() else None
+            self.records.append(record)
+            if outermost:
+                self.stop_tracing()
+            logging.debug(f"{self.title}: {self.format_record(record)}")
+
+    def format_summary(self) -> str:
+        """The time of each stage and the slowest hook, on one line"""
+        stages = [record for record in self.records if record["stage"] is None]
+        hooks = [record for record in self.records if record["stage"] is not None]
+        parts = [f"{record['name']} {record['seconds'] * 1000:.1f} ms" for record in sorted(stages, key=lambda record: record["start"])]
+        parts.append(f"{sum(record['seconds'] for record in stages) * 1000:.1f} ms in total")
+        if hooks:
+            slowest = max(hooks, key=lambda record: record["seconds"])
+            parts.append(f"the slowest hook is {slowest['name']} ({slowest['seconds'] * 1000:.1f} ms)")
+        return f"Stage timings for {self.title}: {', '.join(parts)}"
+
+    @staticmethod
+    def format_record(record: dict[str, Any]) -> str:
+        text = f"{record['name']} took {record['seconds'] * 1000:.2f} ms"
+        if record["memory_delta"] is not None:
+            text += f", traced memory {record['memory_delta'] / 1024:+.1f} KiB"
+        return text
+
+    def write_report(self, handle: TextIO):
+        """Write the stages in the order they started, with the hooks they called under them"""
+        handle.write(f"\n\nGeneration stage timings for {self.title}:\n\n")
+        for record in sorted(self.records, key=lambda record: record["start"]):
+            indent = "    " if record["stage"] is not None else ""
+            handle.write(f"{indent}{self.format_record(record)}\n")
+
+class StageProfiler:
+    """Run the generation stages of a player under cProfile.\n
+    Turned on by ManualWorld.stages_cprofiling or the MANUAL_STAGES_CPROFILE environment variable,
+    the profiles are dumped in the output directory by dump_stage_profiles."""
+
+    environment_variable = "MANUAL_STAGES_CPROFILE"
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    @contextmanager
+    def measure(self) -> Iterator[None]:
+        self.profile.enable()
+        try:
+            yield
+        finally:
+            self.profile.disable()
+
+def dump_stage_profiles(worlds: list["ManualWorld"], output_directory: str, merged_name: str) -> None:
+    """Dump the stage profile of each world as a .pstats file named like its other output files, and all of them merged in one"""
+    merged = None
+    for world in worlds:
+        profiler = getattr(world, 'stage_profiler', None)
+        if profiler is None:
+            continue
+
+        path = os.path.join(output_directory, f"{world.multiworld.get_out_file_name_base(world.player)}.pstats")
+        profiler.profile.dump_stats(path)
+        if merged is None:
+            merged = pstats.Stats(path)
+        else:
+            merged.add(path)
+
+    if merged is not None:
+        merged.dump_stats(os.path.join(output_directory, f"{merged_name}.pstats"))
+
+def timed_stage(method: Optional[Callable] = None, *, profiled: bool = True, last: bool = False) -> Callable:
+    """Record how long a ManualWorld stage method takes in the world's stage timings, see ManualWorld.time_stage.\n
+    Unless profiled is False, the stage also runs under cProfile when stage profiling is on, see ManualWorld.profile_stage.
+    The last stage of generation finishes the stage timings once it's done, see StageTimings.finish"""
+    if method is None:
+        return functools.partial(timed_stage, profiled=profiled, last=last)
+
+    @functools.wraps(method)
+    def timedStage(world: "ManualWorld", *args, **kwargs):
+        try:
+            with world.time_stage(method.__name__), (world.profile_stage() if profiled else nullcontext()):
+                return method(world, *args, **kwargs)
+        finally:
+            if last:
+                world.stage_timings.finish()
+
+    return timedStage
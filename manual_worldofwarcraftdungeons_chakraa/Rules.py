@@ -1,20 +1,26 @@
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Optional, Callable, Iterable, Iterator
 from enum import IntEnum
 from operator import eq, ge, le
 
 from .Regions import regionMap
+from .Items import category_to_item_names, item_name_to_category_keys
+from .Profiling import RuleProfiler, is_profiling_enabled
+from .DataCache import data_cache
 from .hooks import Rules
 from .Helpers import clamp, is_item_enabled, is_option_enabled, get_option_value, convert_string_to_type,\
     format_to_valid_identifier, format_state_prog_items_key, ProgItemsCat
 
-from BaseClasses import MultiWorld, CollectionState
+from BaseClasses import MultiWorld, CollectionState, Item
 from worlds.AutoWorld import World
 from worlds.generic.Rules import set_rule, add_rule
 from Options import Choice, Toggle, Range, NamedRange
 
+from collections import Counter
 import re
+import json
 import math
 import inspect
+import copy
 import logging
 
 if TYPE_CHECKING:
@@ -25,14 +31,51 @@ class LogicErrorSource(IntEnum):
     EVALUATE_POSTFIX = 2 # includes missing pipes and missing value on either side of AND/OR
     EVALUATE_STACK_SIZE = 3 # includes missing curly brackets
 
-def construct_logic_error(location_or_region: dict, source: LogicErrorSource) -> KeyError:
+class RequiresArea:
+    """Read-only description of the location or region a requires belongs to, captured when the rules are set"""
+    __slots__ = ("name", "is_region", "requires")
+    name: Optional[str]
+    is_region: bool
+    requires: str | list | dict | None
+
+    def __init__(self, name: Optional[str], is_region: bool, requires: str | list | dict | None):
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "is_region", is_region)
+        object.__setattr__(self, "requires", requires)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(name={self.name!r}, is_region={self.is_region}, requires={self.requires!r})"
+
+    @classmethod
+    def from_location(cls, location: dict) -> "RequiresArea":
+        return cls(location.get("name"), False, location.get("requires"))
+
+    @classmethod
+    def from_region(cls, region_name: str, region: dict) -> "RequiresArea":
+        return cls(region_name, True, region.get("requires"))
+
+def construct_logic_error(location_or_region: dict | RequiresArea, source: LogicErrorSource) -> KeyError:
     object_type = "location/region"
-    object_name = location_or_region.get("name", "Unknown")
 
-    if location_or_region.get("is_region", False) or "starting" in location_or_region or "connects_to" in location_or_region:
-        object_type = "region"
-    elif "region" in location_or_region or "category" in location_or_region:
-        object_type = "location"
+    if isinstance(location_or_region, RequiresArea):
+        object_name = location_or_region.name or "Unknown"
+        if location_or_region.is_region:
+            object_type = "region"
+        elif location_or_region.name is not None:
+            object_type = "location"
+    else:
+        object_name = location_or_region.get("name", "Unknown")
+
+        if location_or_region.get("is_region", False) or "starting" in location_or_region or "connects_to" in location_or_region:
+            object_type = "region"
+        elif "region" in location_or_region or "category" in location_or_region:
+            object_type = "location"
 
     if source == LogicErrorSource.INFIX_TO_POSTFIX:
         source_text = "There may be mismatched parentheses, or other invalid syntax for the requires."
@@ -101,207 +144,725 @@ def evaluate_postfix(expr: str, location: str) -> bool:
 
     return stack.pop()
 
-def set_rules(world: "ManualWorld", multiworld: MultiWorld, player: int):
-    # this is only called when the area (think, location or region) has a "requires" field that is a string
-    def checkRequireStringForArea(state: CollectionState, area: dict):
-        requires_list = area["requires"]
-
-        # Get the "real" item counts of item in the pool/placed/starting_items
-        items_counts = world.get_item_counts(player, only_progression=True)
-
-        # Preparing some variables for exception messages
-        area_type = "region" if area.get("is_region",False) else "location"
-        area_name = area.get("name", f"unknown with these parameters: {area}")
+# Patterns used to find requirement functions and items in requires strings
+FUNCTION_PATTERN = re.compile(r'\{(\w+)\((.*?)\)\}')
+ITEM_PATTERN = re.compile(r'\|[^|]+\|')
+
+# While parsing, every function call and item of a requires is swapped for a single character from a private use plane.
+# They act like the 1 and 0 the evaluator used to put there, including counting as a word character around AND/OR.
+_PLACEHOLDER_START = 0xF0000
+_AND_PATTERN = re.compile(r'\s?(?<![\w\U000F0000-\U000FFFFD])AND(?![\w\U000F0000-\U000FFFFD])\s?', re.IGNORECASE)
+_OR_PATTERN = re.compile(r'\s?(?<![\w\U000F0000-\U000FFFFD])OR(?![\w\U000F0000-\U000FFFFD])\s?', re.IGNORECASE)
+
+# Seeded with the requires a data bundle has already parsed, see Bundle.py
+_parsed_requires: dict[str, tuple] = dict(data_cache.tables.get("Rules", {}))
+
+def normalize_requires(requires: str | list | dict) -> str:
+    """Returns the text used to identify identical requires"""
+    if isinstance(requires, str):
+        return requires.strip() or requires
+    return json.dumps(requires)
+
+def parse_requires_string(requires: str, area: dict | RequiresArea) -> tuple:
+    """Parse a requires string into a tree of tuples, the result is cached by the requires text.\n
+    The nodes are ("const", bool), ("item", name, count), ("category", name, count), ("function", name, args),
+    ("not", node) and ("and"/"or", *nodes). Counts are kept as written (eg. "1", "ALL", "50%")."""
+    tree = _parsed_requires.get(requires)
+    if tree is not None:
+        return tree
+
+    operands = {}
+    expression = requires
+
+    for func_name, func_args in FUNCTION_PATTERN.findall(expression):
+        call = "{" + func_name + "(" + func_args + ")}"
+        if call not in expression:
+            continue
+        placeholder = chr(_PLACEHOLDER_START + len(operands))
+        operands[placeholder] = ("function", func_name, func_args)
+        expression = expression.replace(call, placeholder)
 
-        if requires_list == "":
-            return True
+    for item in ITEM_PATTERN.findall(expression):
+        if item not in expression:
+            continue
+        require_type = "category" if '|@' in item else "item"
+        item_name = item.lstrip('|@$').rstrip('|')
+        item_count = "1"
+
+        item_parts = item_name.split(":")
+        if len(item_parts) > 1:
+            item_name = item_parts[0].strip()
+            item_count = item_parts[1].strip()
+
+        placeholder = chr(_PLACEHOLDER_START + len(operands))
+        operands[placeholder] = (require_type, item_name, item_count)
+        expression = expression.replace(item, placeholder)
+
+    expression = _AND_PATTERN.sub('&', expression)
+    expression = _OR_PATTERN.sub('|', expression)
+
+    # every operand becomes a digit so infix_to_postfix keeps them, in order, exactly like it did with the 1 and 0
+    ordered_operands = []
+    infix = []
+    for c in expression:
+        if c in operands:
+            ordered_operands.append(operands[c])
+            infix.append("1")
+        elif c.isnumeric():
+            ordered_operands.append(("const", c == "1") if c in "01" else None)
+            infix.append(c)
+        else:
+            infix.append(c)
+
+    postfix = infix_to_postfix("".join(infix), area)
 
-        def findAndRecursivelyExecuteFunctions(requires_list: str, recursionDepth: int = 0) -> str:
-            found_functions = re.findall(r'\{(\w+)\((.*?)\)\}', requires_list)
-            if found_functions:
-                if recursionDepth > world.rules_functions_maximum_recursion:
-                    raise RecursionError(f'One or more functions in {area_type} "{area_name}"\'s requires looped too many time (maximum recursion is {world.rules_functions_maximum_recursion}) \
-                                         \n    As of this Exception the following function(s) are waiting to run: {[f[0] for f in found_functions]} \
-                                         \n    And the currently processed requires look like this: "{requires_list}"')
-                else:
-                    for item in found_functions:
-                        func_name = item[0]
-                        func_args = item[1].split(",")
-                        if func_args == ['']:
-                            func_args.pop()
-
-                        func = globals().get(func_name)
-
-                        if func is None:
-                            func = getattr(Rules, func_name, None)
-
-                        if not callable(func):
-                            raise ValueError(f'Invalid function "{func_name}" in {area_type} "{area_name}".')
-
-                        convert_req_function_args(state, func, func_args, area_name)
-                        try:
-                            result = func(*func_args)
-                        except Exception as ex:
-                            raise RuntimeError(f'A call to the function "{func_name}" in {area_type} "{area_name}"\'s requires raised an Exception. \
-                                                \nUnless it was called by another function, it should look something like "{{{func_name}({item[1]})}}" in {area_type}s.json. \
-                                                \nFull error message: \
-                                                \n\n{type(ex).__name__}: {ex}')
-                        if isinstance(result, bool):
-                            requires_list = requires_list.replace("{" + func_name + "(" + item[1] + ")}", "1" if result else "0")
-                        else:
-                            requires_list = requires_list.replace("{" + func_name + "(" + item[1] + ")}", str(result))
-
-                requires_list = findAndRecursivelyExecuteFunctions(requires_list, recursionDepth + 1)
-            return requires_list
-
-        requires_list = findAndRecursivelyExecuteFunctions(requires_list)
-
-        # parse user written statement into list of each item
-        for item in re.findall(r'\|[^|]+\|', requires_list):
-            require_type = 'item'
-
-            if '|@' in item:
-                require_type = 'category'
-
-            item_base = item
-            item = item.lstrip('|@$').rstrip('|')
-
-            item_parts = item.split(":")  # type: list[str]
-            item_name = item
-            item_count = "1"
-
-
-            if len(item_parts) > 1:
-                item_name = item_parts[0].strip()
-                item_count = item_parts[1].strip()
-
-            total = 0
-
-            if require_type == 'category':
-                category_items = [item for item in world.item_name_to_item.values() if "category" in item and item_name in item["category"]]
-                category_items_counts = sum([items_counts.get(category_item["name"], 0) for category_item in category_items])
-                if item_count.lower() == 'all':
-                    item_count = category_items_counts
-                elif item_count.lower() == 'half':
-                    item_count = int(category_items_counts / 2)
-                elif item_count.endswith('%') and len(item_count) > 1:
-                    percent = clamp(float(item_count[:-1]) / 100, 0, 1)
-                    item_count = math.ceil(category_items_counts * percent)
-                else:
-                    try:
-                        item_count = int(item_count)
-                    except ValueError as e:
-                        raise ValueError(f"Invalid item count `{item_name}` in {area}.") from e
-
-                for category_item in category_items:
-                    total += state.count(category_item["name"], player)
-
-                    if total >= item_count:
-                        requires_list = requires_list.replace(item_base, "1")
-            elif require_type == 'item':
-                item_current_count = items_counts.get(item_name, 0)
-                if item_count.lower() == 'all':
-                    item_count = item_current_count
-                elif item_count.lower() == 'half':
-                    item_count = int(item_current_count / 2)
-                elif item_count.endswith('%') and len(item_count) > 1:
-                    percent = clamp(float(item_count[:-1]) / 100, 0, 1)
-                    item_count = math.ceil(item_current_count * percent)
-                else:
-                    item_count = int(item_count)
+    stack = []
+    operand_index = 0
+    try:
+        for c in postfix:
+            if c.isnumeric():
+                operand = ordered_operands[operand_index]
+                operand_index += 1
+                if operand is not None:
+                    stack.append(operand)
+            elif c == "&" or c == "|":
+                op2 = stack.pop()
+                op1 = stack.pop()
+                stack.append(_combine_nodes("and" if c == "&" else "or", op1, op2))
+            elif c == "!":
+                stack.append(("not", stack.pop()))
+    except Exception:
+        raise construct_logic_error(area, LogicErrorSource.EVALUATE_POSTFIX)
 
-                total = state.count(item_name, player)
+    if len(stack) != 1:
+        raise construct_logic_error(area, LogicErrorSource.EVALUATE_STACK_SIZE)
+
+    tree = stack.pop()
+    _parsed_requires[requires] = tree
+    return tree
+
+def _combine_nodes(operator: str, op1: tuple, op2: tuple) -> tuple:
+    """AND and OR are associative so chains of them are flattened into a single node"""
+    children = []
+    for op in (op1, op2):
+        if op[0] == operator:
+            children.extend(op[1:])
+        else:
+            children.append(op)
+    return (operator, *children)
+
+def iterate_nodes(tree: tuple) -> Iterator[tuple]:
+    """Yields every node of a parsed requires, leaves are in the order they are written"""
+    yield tree
+    if tree[0] in ("and", "or", "not"):
+        for child in tree[1:]:
+            yield from iterate_nodes(child)
+
+def get_function_nodes(tree: tuple) -> list[tuple]:
+    """Returns the distinct function nodes of a parsed requires, in the order they are written"""
+    found = []
+    for node in iterate_nodes(tree):
+        if node[0] == "function" and node not in found:
+            found.append(node)
+    return found
+
+def get_tree_dependencies(tree: tuple) -> set[str]:
+    """Returns the keys of the state's prog_items the items and categories of a parsed requires read"""
+    dependencies = set()
+    for node in iterate_nodes(tree):
+        if node[0] == "item":
+            dependencies.add(node[1])
+        elif node[0] == "category":
+            dependencies.add(format_state_prog_items_key(ProgItemsCat.CATEGORY, node[1]))
+    return dependencies
+
+def fold_constants(node: tuple, values: dict[tuple, bool]) -> tuple:
+    """Replaces the function nodes found in values with their result and simplifies the requires around constants,
+    an AND containing a false or an OR containing a true become constants and the other constants are dropped"""
+    node_type = node[0]
+    if node_type == "function":
+        return ("const", values[node]) if node in values else node
+
+    if node_type == "not":
+        operand = fold_constants(node[1], values)
+        if operand[0] == "const":
+            return ("const", not operand[1])
+        return ("not", operand)
+
+    if node_type in ("and", "or"):
+        absorbing = node_type == "or"
+        children = []
+        for child in node[1:]:
+            child = fold_constants(child, values)
+            if child[0] == "const":
+                if child[1] == absorbing:
+                    return child
+                continue
+            if child[0] == node_type:
+                children.extend(child[1:])
+            else:
+                children.append(child)
+        if not children:
+            return ("const", not absorbing)
+        if len(children) == 1:
+            return children[0]
+        return (node_type, *children)
+
+    return node
+
+def ignores_state(func: Callable) -> Callable:
+    """Marks a requires function that asks for the CollectionState without using it, so it can still be constant-folded"""
+    func.ignores_state = True
+    return func
+
+def depends_on_state(func: Callable) -> bool:
+    """Does a requires function ask for the CollectionState, if not its result can't change during generation"""
+    if getattr(func, 'ignores_state', False):
+        return False
+    return any(parameter.annotation in (CollectionState, 'CollectionState') for parameter in inspect.signature(func).parameters.values())
+
+def is_relative_count(item_count: str) -> bool:
+    """Is the count of a requirement relative to the item pool, like ALL, HALF or 50%"""
+    lowered_count = item_count.lower()
+    return lowered_count == 'all' or lowered_count == 'half' or (item_count.endswith('%') and len(item_count) > 1)
+
+def compute_relative_count(world: "ManualWorld", require_type: str, item_name: str, item_count: str) -> int:
+    """Convert a relative count (ALL, HALF or a percentage) to the amount of items it represents in the player's pool"""
+    items_counts = world.get_item_counts(world.player, only_progression=True)
+    names = category_to_item_names.get(item_name, ()) if require_type == "category" else (item_name,)
+    current_count = sum(items_counts.get(name, 0) for name in names)
+
+    lowered_count = item_count.lower()
+    if lowered_count == 'all':
+        return current_count
+    elif lowered_count == 'half':
+        return int(current_count / 2)
+
+    percent = clamp(float(item_count[:-1]) / 100, 0, 1)
+    return math.ceil(current_count * percent)
+
+def build_requires_thresholds(world: "ManualWorld") -> dict[tuple[str, str, str], int]:
+    """Compute the counts of every ALL, HALF and percentage requirement found in the requires of the locations and regions.\n
+    Called once the player's item pool is known, so rules don't have to count the pool while being evaluated."""
+    thresholds = {}
+    for area in [*world.location_table, *regionMap.values()]:
+        for requires in get_requires_strings(area):
+            try:
+                tree = parse_requires_string(requires, area)
+            except Exception:
+                continue # invalid requires are reported when the rules get set
 
-                if total >= item_count:
-                    requires_list = requires_list.replace(item_base, "1")
+            for node in iterate_nodes(tree):
+                if node[0] not in ("item", "category") or not is_relative_count(node[2]):
+                    continue
+                key = (node[0], node[1], node[2].lower())
+                if key in thresholds:
+                    continue
+                try:
+                    thresholds[key] = compute_relative_count(world, node[0], node[1], node[2])
+                except ValueError:
+                    continue
+    return thresholds
+
+def get_requires_strings(area: dict) -> list[str]:
+    """The normalized requires strings of a location or region, its entrance and exit requires included"""
+    requires_list = [area.get("requires"), *area.get("entrance_requires", {}).values(), *area.get("exit_requires", {}).values()]
+    return [normalize_requires(requires) for requires in requires_list if isinstance(requires, str) and requires.strip()]
+
+def parse_all_requires(areas: Iterable[dict]) -> dict[str, tuple]:
+    """Parse every requires string of these locations and regions, returns the trees by requires text"""
+    trees = {}
+    for area in areas:
+        for requires in get_requires_strings(area):
+            try:
+                trees[requires] = parse_requires_string(requires, area)
+            except Exception:
+                continue # invalid requires are reported when the rules get set
+    return trees
 
-            if total <= item_count:
-                requires_list = requires_list.replace(item_base, "0")
+def _always_true(state: CollectionState) -> bool:
+    return True
 
-        requires_list = re.sub(r'\s?\bAND\b\s?', '&', requires_list, 0, re.IGNORECASE)
-        requires_list = re.sub(r'\s?\bOR\b\s?', '|', requires_list, 0, re.IGNORECASE)
+def _always_false(state: CollectionState) -> bool:
+    return False
 
-        requires_string = infix_to_postfix("".join(requires_list), area)
-        return (evaluate_postfix(requires_string, area))
+class RuleCompiler:
+    """Compile the requires of locations and regions of a player into access rules.\n
+    Requires strings are parsed once and turned into closures that only have to check the CollectionState."""
+
+    def __init__(self, world: "ManualWorld"):
+        self.world = world
+        self.multiworld = world.multiworld
+        self.player = world.player
+        self.interned_rules: dict[tuple[int, str], Callable[[CollectionState], bool]] = {}
+        self.bound_arguments: dict[tuple, tuple[list, tuple[int, ...], tuple[int, ...]]] = {}
+        # the rule set_rules gave each location and the areas whose requires are all needed by that rule
+        self.location_areas: dict[str, tuple[Callable[[CollectionState], bool], tuple[RequiresArea, ...]]] = {}
+        self.area_dependencies: dict[str, Optional[frozenset[str]]] = {}
+        self.memo_keys_by_dependency: dict[str, list[str]] = {}
+        self.memo_keys_by_item: dict[str, tuple[str, ...]] = {}
+        self.memoization = world.are_rules_memoized()
+        self.profiler: Optional[RuleProfiler] = None
+        if is_profiling_enabled(world, 'rules_profiling', RuleProfiler.environment_variable):
+            self.profiler = RuleProfiler()
+
+    def compile_area(self, area: Optional[RequiresArea]) -> Callable[[CollectionState], bool]:
+        """Returns the access rule of a location/region, areas with the same requires share the same rule"""
+        # don't require the "requires" key for locations and regions if they don't need to use it
+        if area is None or area.requires is None:
+            return _always_true
+
+        requires = area.requires
+        # rules aren't shared between players: ALL/HALF/% counts and folded functions depend on the player's pool and options,
+        # and access rules are only given the state, so the player is part of the closure
+        key = (self.player, normalize_requires(requires))
+        rule = self.interned_rules.get(key)
+        if rule is not None:
+            return rule
+
+        if isinstance(requires, str):
+            rule = self.compile_requires_string(key[1], area, memoize_index=len(self.interned_rules))
+        elif isinstance(requires, (list, dict)) and not requires:
+            rule = _always_true
+        else:  # item access is in dict form
+            rule = self.memoize(self.compile_requires_dict(requires), len(self.interned_rules), self.get_area_dependencies(area))
+
+        self.interned_rules[key] = rule
+        return rule
+
+    def compile_single_requirement(self, node: tuple, area: RequiresArea) -> Optional[Callable[[CollectionState], bool]]:
+        """Returns a rule calling state.has directly when the requires is a single item or category, otherwise None.\n
+        Categories are checked against the count kept in prog_items by ManualWorld.collect/remove."""
+        node_type = node[0]
+        if node_type == "const":
+            return _always_true if node[1] else _always_false
+
+        if node_type not in ("item", "category"):
+            return None
+
+        player = self.player
+        item_name = node[1]
+        required_count = self.required_count(node, area)
+
+        if node_type == "category":
+            # an unknown or empty category can never be satisfied
+            if not self.category_items(item_name):
+                return _always_false
+            category_key = format_state_prog_items_key(ProgItemsCat.CATEGORY, item_name)
+            return lambda state: state.has(category_key, player, required_count)
+
+        return lambda state: state.has(item_name, player, required_count)
+
+    def category_items(self, category_name: str) -> tuple[str, ...]:
+        return category_to_item_names.get(category_name, ())
+
+    def memoize(self, rule: Callable[[CollectionState], bool], index: int, dependencies: Iterable[str]) -> Callable[[CollectionState], bool]:
+        """Remember the result of a rule in the state until one of the prog_items it depends on changes.\n
+        The result is stored in the state's prog_items so copies of the state keep it,
+        ManualWorld.collect/remove drop it when an item the rule depends on changes (see get_memo_keys)."""
+        if not self.memoization:
+            return rule
+
+        player = self.player
+        result_key = format_state_prog_items_key(ProgItemsCat.RULE, f"result_{index}")
+
+        for dependency in dependencies:
+            self.memo_keys_by_dependency.setdefault(dependency, []).append(result_key)
+        self.memo_keys_by_item.clear()
+
+        def checkMemoized(state: CollectionState) -> bool:
+            prog_items = state.prog_items[player]
+            cached = prog_items.get(result_key)
+            if cached is not None:
+                return cached == 1
+
+            result = rule(state)
+            prog_items[result_key] = int(result)
+            return result
+
+        return checkMemoized
+
+    def get_memo_keys(self, item_name: str) -> tuple[str, ...]:
+        """Returns the keys of the memoized results to drop from the state's prog_items when the item is collected or removed"""
+        memo_keys = self.memo_keys_by_item.get(item_name)
+        if memo_keys is None:
+            found = {}
+            for key in self.get_item_keys(item_name):
+                found.update(dict.fromkeys(self.memo_keys_by_dependency.get(key, ())))
+            memo_keys = tuple(found)
+            self.memo_keys_by_item[item_name] = memo_keys
+        return memo_keys
+
+    def forget_results(self, state: CollectionState, item: Item):
+        """Drop the memoized results that could change now that the item was collected or removed"""
+        prog_items = state.prog_items[item.player]
+        for memo_key in self.get_memo_keys(item.name):
+            prog_items.pop(memo_key, None)
+
+    def compile_requires_string(self, requires: str, area: RequiresArea, recursionDepth: int = 0, memoize_index: Optional[int] = None) -> Callable[[CollectionState], bool]:
+        """Returns the rule of a requires string.\n
+        Functions that don't ask for the CollectionState are called once here and their result is folded into the requires,
+        when memoize_index is given the rules left without functions remember their result in the state."""
+        if recursionDepth == 0 and requires == "":
+            return _always_true
+
+        tree = parse_requires_string(requires, area)
+        functions = get_function_nodes(tree)
+        folded = {}
+        calls = []
+
+        area_type = "region" if area.is_region else "location"
+        area_name = area.name if area.name is not None else f"unknown with these parameters: {area}"
+
+        if functions:
+            if recursionDepth > self.world.rules_functions_maximum_recursion:
+                raise RecursionError(f'One or more functions in {area_type} "{area_name}"\'s requires looped too many time (maximum recursion is {self.world.rules_functions_maximum_recursion}) \
+                                     \n    As of this Exception the following function(s) are waiting to run: {[f[1] for f in functions]} \
+                                     \n    And the currently processed requires look like this: "{requires}"')
+
+            for node in functions:
+                func = self.find_function(node[1], area_type, area_name)
+                if depends_on_state(func):
+                    calls.append((node, func))
+                else:
+                    folded[node] = self.call_constant_function(func, node, area_type, area_name)
+
+            if all(isinstance(result, bool) for result in folded.values()):
+                tree = fold_constants(tree, folded)
+                folded = {}
+                remaining = get_function_nodes(tree)
+                calls = [(node, func) for node, func in calls if node in remaining]
+            elif not calls:
+                # Every function is already resolved and one returned a requires string, put the results in the text like the runtime would
+                return self.compile_requires_string(self.substitute_results(requires, folded), area, recursionDepth + 1, memoize_index)
+
+        if not calls:
+            # requires like |Item|, |Item:2| or |@Category:ALL| are checked directly against the state
+            rule = self.compile_single_requirement(tree, area)
+            if rule is None:
+                evaluate = self.lower(tree, area)
+                rule = lambda state: evaluate(state, None)
+                if memoize_index is not None:
+                    rule = self.memoize(rule, memoize_index, get_tree_dependencies(tree))
+            return rule
+
+        evaluate = self.lower(tree, area)
+        substituted_rules: dict[str, Callable[[CollectionState], bool]] = {}
+
+        def checkRequiresWithFunctions(state: CollectionState) -> bool:
+            # folded only keeps results when a constant function returned a requires string
+            results = dict(folded)
+            only_bools = not folded
+            for node, func in calls:
+                result = self.call_function(state, func, node, area_type, area_name)
+                results[node] = result
+                if not isinstance(result, bool):
+                    only_bools = False
+
+            if only_bools:
+                return evaluate(state, results)
+
+            # A function returned a requires string, so put the results back in the text and evaluate that instead
+            requires_list = self.substitute_results(requires, results)
+            rule = substituted_rules.get(requires_list)
+            if rule is None:
+                rule = self.compile_requires_string(requires_list, area, recursionDepth + 1)
+                substituted_rules[requires_list] = rule
+            return rule(state)
+
+        return checkRequiresWithFunctions
+
+    def substitute_results(self, requires: str, results: dict) -> str:
+        for node, result in results.items():
+            if isinstance(result, bool):
+                result = "1" if result else "0"
+            requires = requires.replace("{" + node[1] + "(" + node[2] + ")}", str(result))
+        return requires
+
+    def lower(self, node: tuple, area: RequiresArea) -> Callable[[CollectionState, Optional[dict]], bool]:
+        """Turn a node of a parsed requires into a closure taking the state and the results of the requires' functions"""
+        node_type = node[0]
+        player = self.player
+
+        if node_type == "const":
+            value = node[1]
+            return lambda state, results: value
+
+        if node_type == "function":
+            return lambda state, results: results[node]
+
+        if node_type == "not":
+            operand = self.lower(node[1], area)
+            return lambda state, results: not operand(state, results)
+
+        if node_type == "and":
+            children = tuple(self.lower(child, area) for child in node[1:])
+            def checkAll(state: CollectionState, results: Optional[dict]) -> bool:
+                for child in children:
+                    if not child(state, results):
+                        return False
+                return True
+            return checkAll
+
+        if node_type == "or":
+            children = tuple(self.lower(child, area) for child in node[1:])
+            def checkAny(state: CollectionState, results: Optional[dict]) -> bool:
+                for child in children:
+                    if child(state, results):
+                        return True
+                return False
+            return checkAny
+
+        item_name = node[1]
+        required_count = self.required_count(node, area)
+
+        if node_type == "category":
+            if not self.category_items(item_name):
+                return lambda state, results: False
+            item_name = format_state_prog_items_key(ProgItemsCat.CATEGORY, item_name)
+
+        return lambda state, results: state.has(item_name, player, required_count)
+
+    def required_count(self, node: tuple, area: RequiresArea) -> int:
+        """Returns the count needed by an item or category node.\n
+        ALL, HALF and percentages are read from the player's requires_thresholds, computed once the item pool is known
+        and again if the progression item counts were changed since."""
+        node_type, item_name, item_count = node
+
+        if not is_relative_count(item_count):
+            try:
+                return int(item_count)
+            except ValueError as e:
+                raise ValueError(f"Invalid item count `{item_name}` in {area}.") from e
+
+        counts = self.world.get_item_counts(self.player, only_progression=True)
+        if counts != self.world.requires_thresholds_counts.get(self.player):
+            # the progression counts changed since create_items, eg. a hook replaced item_counts_progression
+            self.world.requires_thresholds[self.player] = build_requires_thresholds(self.world)
+            self.world.requires_thresholds_counts[self.player] = Counter(counts)
+
+        thresholds = self.world.requires_thresholds.setdefault(self.player, {})
+        key = (node_type, item_name, item_count.lower())
+        if key not in thresholds:
+            try:
+                thresholds[key] = compute_relative_count(self.world, node_type, item_name, item_count)
+            except ValueError as e:
+                raise ValueError(f"Invalid item count `{item_name}` in {area}.") from e
+        return thresholds[key]
+
+    def find_function(self, func_name: str, area_type: str, area_name: str) -> Callable:
+        func = globals().get(func_name)
+
+        if func is None:
+            func = getattr(Rules, func_name, None)
+
+        if not callable(func):
+            raise ValueError(f'Invalid function "{func_name}" in {area_type} "{area_name}".')
+
+        return func
+
+    def fold_requires_string(self, requires: str, area: RequiresArea) -> tuple:
+        """Returns the parsed requires with the functions that don't use the state folded in like compile_requires_string does,
+        the function nodes left in it need the state"""
+        if requires == "":
+            return ("const", True)
+
+        area_type = "region" if area.is_region else "location"
+        area_name = area.name if area.name is not None else f"unknown with these parameters: {area}"
+
+        for _ in range(self.world.rules_functions_maximum_recursion + 1):
+            tree = parse_requires_string(requires, area)
+            results = {}
+            needs_state = False
+            for node in get_function_nodes(tree):
+                func = self.find_function(node[1], area_type, area_name)
+                if depends_on_state(func):
+                    needs_state = True
+                else:
+                    results[node] = self.call_constant_function(func, node, area_type, area_name)
+
+            if all(isinstance(result, bool) for result in results.values()):
+                return fold_constants(tree, results)
+
+            if needs_state:
+                return tree
+            requires = self.substitute_results(requires, results)
+
+        return tree
+
+    def get_area_dependencies(self, area: Optional[RequiresArea]) -> Optional[frozenset[str]]:
+        """Returns the keys of the state's prog_items (item names, category and value keys) the requires of an area read,
+        or None if it calls functions that use the state since those could read anything"""
+        if area is None or area.requires is None:
+            return frozenset()
+
+        key = normalize_requires(area.requires)
+        if key in self.area_dependencies:
+            return self.area_dependencies[key]
+
+        dependencies = set()
+        if isinstance(area.requires, str):
+            area_type = "region" if area.is_region else "location"
+            area_name = area.name if area.name is not None else f"unknown with these parameters: {area}"
+            tree = self.fold_requires_string(key, area)
+            dependencies.update(get_tree_dependencies(tree))
+            for node in get_function_nodes(tree):
+                # ItemValue only reads the value it's given
+                if self.find_function(node[1], area_type, area_name) is not ItemValue:
+                    dependencies = None
+                    break
+                dependencies.add(format_state_prog_items_key(ProgItemsCat.VALUE, node[2].split(":")[0].strip()))
+        elif area.requires:
+            or_groups, required_items = split_requires_dict(area.requires)
+            for items in (*or_groups, required_items):
+                dependencies.update(item_name for item_name, _ in items)
+
+        self.area_dependencies[key] = frozenset(dependencies) if dependencies is not None else None
+        return self.area_dependencies[key]
+
+    def get_item_keys(self, item_name: str) -> list[str]:
+        """Returns the keys of the state's prog_items that change when the item is collected or removed"""
+        keys = [item_name, *item_name_to_category_keys.get(item_name, ())]
+        keys.extend(format_state_prog_items_key(ProgItemsCat.VALUE, value) for value in self.world.item_name_to_item.get(item_name, {}).get("value", {}))
+        return keys
+
+    def call_function(self, state: CollectionState, func: Callable, node: tuple, area_type: str, area_name: str):
+        func_name, raw_args = node[1], node[2]
+        bound = self.bound_arguments.get(node)
+        if bound is None:
+            bound = self.bind_function_arguments(func, raw_args, area_name)
+            self.bound_arguments[node] = bound
+
+        func_args, state_slots, mutable_slots = bound
+        if state_slots or mutable_slots:
+            func_args = func_args.copy()
+            for index in state_slots:
+                func_args[index] = state
+            # each call gets its own copy of the lists, dicts and sets written in the requires, like when they were converted every call
+            for index in mutable_slots:
+                func_args[index] = copy.deepcopy(func_args[index])
+        try:
+            if self.profiler is not None:
+                return self.profiler.call_function(func_name, func, func_args)
+            return func(*func_args)
+        except Exception as ex:
+            raise RuntimeError(f'A call to the function "{func_name}" in {area_type} "{area_name}"\'s requires raised an Exception. \
+                                \nUnless it was called by another function, it should look something like "{{{func_name}({raw_args})}}" in {area_type}s.json. \
+                                \nFull error message: \
+                                \n\n{type(ex).__name__}: {ex}')
+
+    def bind_function_arguments(self, func: Callable, raw_args: str, area_name: str) -> tuple[list, tuple[int, ...], tuple[int, ...]]:
+        """Returns the arguments of a call with this player's world, multiworld and player filled in,
+        along with the positions the state has to be put in and the positions of the arguments to copy before each call"""
+        func_args = []
+        state_slots = []
+        mutable_slots = []
+        for argument in get_req_function_binding(func, raw_args, area_name):
+            if isinstance(argument, (list, dict, set)):
+                mutable_slots.append(len(func_args))
+            elif isinstance(argument, FunctionArgument):
+                if argument == FunctionArgument.STATE:
+                    state_slots.append(len(func_args))
+                    argument = None
+                elif argument == FunctionArgument.WORLD:
+                    argument = self.world
+                elif argument == FunctionArgument.MULTIWORLD:
+                    argument = self.multiworld
+                elif argument == FunctionArgument.PLAYER:
+                    argument = self.player
+            func_args.append(argument)
+        return func_args, tuple(state_slots), tuple(mutable_slots)
+
+    def call_constant_function(self, func: Callable, node: tuple, area_type: str, area_name: str):
+        """Calls a function that doesn't use the state, the result is kept for the other requires calling it the same way"""
+        if not hasattr(self, 'constant_results'):
+            self.constant_results = {}
+
+        if node not in self.constant_results:
+            self.constant_results[node] = self.call_function(None, func, node, area_type, area_name)
+        return self.constant_results[node]
 
     # this is only called when the area (think, location or region) has a "requires" field that is a dict
-    def checkRequireDictForArea(state: CollectionState, area: dict):
-        canAccess = True
+    def compile_requires_dict(self, requires: list | dict) -> Callable[[CollectionState], bool]:
+        """Requires in dict form are split once into the "or" groups and the other items, see split_requires_dict"""
+        player = self.player
+        or_groups, required_items = split_requires_dict(requires)
+
+        def checkRequireDictForArea(state: CollectionState):
+            for or_items in or_groups:
+                for item_name, item_count in or_items:
+                    if not state.has(item_name, player, item_count):
+                        break
+                else:
+                    return True
 
-        for item in area["requires"]:
-            # if the require entry is an object with "or" or a list of items, treat it as a standalone require of its own
-            if (isinstance(item, dict) and "or" in item and isinstance(item["or"], list)) or (isinstance(item, list)):
-                canAccessOr = True
-                or_items = item
+            for item_name, item_count in required_items:
+                if not state.has(item_name, player, item_count):
+                    return False
 
-                if isinstance(item, dict):
-                    or_items = item["or"]
+            return True
 
-                for or_item in or_items:
-                    or_item_parts = or_item.split(":")
-                    or_item_name = or_item
-                    or_item_count = 1
+        return checkRequireDictForArea
 
-                    if len(or_item_parts) > 1:
-                        or_item_name = or_item_parts[0]
-                        or_item_count = int(or_item_parts[1])
+def split_requires_dict(requires: list | dict) -> tuple[tuple[tuple[tuple[str, int], ...], ...], tuple[tuple[str, int], ...]]:
+    """Returns the "or" groups and the other items of a requires in dict form, as (item name, count) pairs.\n
+    An "or" group (an object with "or" or a list of items) is a standalone require of its own: the area can be accessed
+    if all the items of any group are there, or if all the other items are there."""
+    or_groups = []
+    required_items = []
 
-                    if not state.has(or_item_name, player, or_item_count):
-                        canAccessOr = False
+    for item in requires:
+        # if the require entry is an object with "or" or a list of items, treat it as a standalone require of its own
+        if (isinstance(item, dict) and "or" in item and isinstance(item["or"], list)) or (isinstance(item, list)):
+            or_items = item
 
-                if canAccessOr:
-                    canAccess = True
-                    break
-            else:
-                item_parts = item.split(":")
-                item_name = item
-                item_count = 1
+            if isinstance(item, dict):
+                or_items = item["or"]
 
-                if len(item_parts) > 1:
-                    item_name = item_parts[0]
-                    item_count = int(item_parts[1])
+            or_groups.append(tuple(split_requires_dict_item(or_item) for or_item in or_items))
+        else:
+            required_items.append(split_requires_dict_item(item))
 
-                if not state.has(item_name, player, item_count):
-                    canAccess = False
+    return tuple(or_groups), tuple(required_items)
 
-        return canAccess
+def split_requires_dict_item(item: str) -> tuple[str, int]:
+    """Returns the name and count of an item of a requires in dict form, written like Item or Item:2"""
+    item_parts = item.split(":")
+    item_name = item
+    item_count = 1
 
-    # handle any type of checking needed, then ferry the check off to a dedicated method for that check
-    def fullLocationOrRegionCheck(state: CollectionState, area: dict):
-        # if it's not a usable object of some sort, default to true
-        if not area:
-            return True
+    if len(item_parts) > 1:
+        item_name = item_parts[0]
+        item_count = int(item_parts[1])
 
-        # don't require the "requires" key for locations and regions if they don't need to use it
-        if "requires" not in area.keys():
-            return True
+    return item_name, item_count
 
-        if isinstance(area["requires"], str):
-            return checkRequireStringForArea(state, area)
-        else:  # item access is in dict form
-            return checkRequireDictForArea(state, area)
+def set_rules(world: "ManualWorld", multiworld: MultiWorld, player: int):
+    compiler = RuleCompiler(world)
+    world.rule_compiler = compiler
+    profiler = compiler.profiler
+
+    def profiled(kind: str, name: str, rule: Callable[[CollectionState], bool]) -> Callable[[CollectionState], bool]:
+        return profiler.wrap_rule(kind, name, rule) if profiler is not None else rule
 
     used_location_names = []
+    region_areas = {region: RequiresArea.from_region(region, regionMap[region]) for region in regionMap.keys()}
     # Region access rules
     for region in regionMap.keys():
         used_location_names.extend([l.name for l in multiworld.get_region(region, player).locations])
         if region != "Menu":
-            for exitRegion in multiworld.get_region(region, player).entrances:
-                def fullRegionCheck(state: CollectionState, region=regionMap[region], region_name=exitRegion.name):
-                    region['name'] = region_name
-                    region['is_region'] = True
-
-                    return fullLocationOrRegionCheck(state, region)
+            region_rule = compiler.compile_area(region_areas[region])
 
-                add_rule(world.get_entrance(exitRegion.name), fullRegionCheck)
+            for exitRegion in multiworld.get_region(region, player).entrances:
+                add_rule(world.get_entrance(exitRegion.name), profiled("region", exitRegion.name, region_rule))
             entrance_rules = regionMap[region].get("entrance_requires", {})
             for e in entrance_rules:
                 entrance = world.get_entrance(f'{e}To{region}')
-                add_rule(entrance, lambda state, rule={"requires": entrance_rules[e]}: fullLocationOrRegionCheck(state, rule))
+                add_rule(entrance, profiled("entrance", entrance.name, compiler.compile_area(RequiresArea(None, False, entrance_rules[e]))))
             exit_rules = regionMap[region].get("exit_requires", {})
             for e in exit_rules:
                 exit = world.get_entrance(f'{region}To{e}')
-                add_rule(exit, lambda state, rule={"requires": exit_rules[e]}: fullLocationOrRegionCheck(state, rule))
+                add_rule(exit, profiled("exit", exit.name, compiler.compile_area(RequiresArea(None, False, exit_rules[e]))))
 
     # Location access rules
     for location in world.location_table:
@@ -310,83 +871,105 @@ def set_rules(world: "ManualWorld", multiworld: MultiWorld, player: int):
 
         locFromWorld = multiworld.get_location(location["name"], player)
 
-        locationRegion = regionMap[location["region"]] if "region" in location else None
+        locationRegion = region_areas[location["region"]] if "region" in location else None
 
-        if locationRegion:
-            locationRegion['name'] = location['region']
-            locationRegion['is_region'] = True
+        # Every entrance of a region checks the region's requires, so a location that's still in its region doesn't need to check them again
+        region_checked_by_entrances = locFromWorld.parent_region is not None and locFromWorld.parent_region.name == location.get("region")
 
         if "requires" in location: # Location has requires, check them alongside the region requires
-            def checkBothLocationAndRegion(state: CollectionState, location=location, region=locationRegion):
-                locationCheck = fullLocationOrRegionCheck(state, location)
-                regionCheck = True # default to true unless there's a region with requires
-
-                if region:
-                    regionCheck = fullLocationOrRegionCheck(state, region)
-
-                return locationCheck and regionCheck
+            locationArea = RequiresArea.from_location(location)
+            location_rule = compiler.compile_area(locationArea)
+            region_rule = compiler.compile_area(locationRegion) # default to true unless there's a region with requires
 
-            set_rule(locFromWorld, checkBothLocationAndRegion)
-        elif "region" in location: # Only region access required, check the location's region's requires
-            def fullRegionCheck(state, region=locationRegion):
-                return fullLocationOrRegionCheck(state, region)
+            if region_rule is _always_true or region_checked_by_entrances:
+                rule, areas = location_rule, (locationArea,)
+            else:
+                def checkBothLocationAndRegion(state: CollectionState, location_rule=location_rule, region_rule=region_rule):
+                    return location_rule(state) and region_rule(state)
 
-            set_rule(locFromWorld, fullRegionCheck)
-        else: # No location region and no location requires? It's accessible.
-            def allRegionsAccessible(state):
-                return True
+                rule, areas = checkBothLocationAndRegion, (locationArea, locationRegion)
+        elif "region" in location and not region_checked_by_entrances: # Only region access required, check the location's region's requires
+            rule, areas = compiler.compile_area(locationRegion), (locationRegion,)
+        else: # No location requires and the region is checked by its entrances (or there's no region)? It's accessible.
+            rule, areas = _always_true, ()
 
-            set_rule(locFromWorld, allRegionsAccessible)
+        rule = profiled("location", location["name"], rule)
+        set_rule(locFromWorld, rule)
+        compiler.location_areas[location["name"]] = (rule, areas)
 
     # Victory requirement
     multiworld.completion_condition[player] = lambda state: state.has("__Victory__", player)
 
-    def convert_req_function_args(state: CollectionState, func, args: list[str], areaName: str):
-        parameters = inspect.signature(func).parameters
-        knownParameters = [World, 'ManualWorld', MultiWorld, CollectionState]
-        index = -1
-        for parameter in parameters.values():
-            target_type = parameter.annotation
-            index += 1
-            if target_type in knownParameters:
-                if target_type in [World, 'ManualWorld']:
-                    args.insert(index, world)
-                elif target_type == MultiWorld:
-                    args.insert(index, multiworld)
-                elif target_type == CollectionState:
-                    args.insert(index, state)
-                continue
-            if parameter.name.lower() == "player":
-                args.insert(index, player)
-                continue
+class FunctionArgument(IntEnum):
+    WORLD = 1
+    MULTIWORLD = 2
+    STATE = 3
+    PLAYER = 4
+
+# Binding of the arguments of requires functions, by function and arguments text. See get_req_function_binding
+_req_function_bindings: dict[tuple[Callable, str], tuple] = {}
+
+def get_req_function_binding(func, raw_args: str, areaName: str) -> tuple:
+    """Returns the arguments a requires function is called with, the ones written in the requires are already converted to the
+    type of their parameter and the world, multiworld, state and player parameters are left as a FunctionArgument to fill in.\n
+    The binding is shared by every call, so the lists, dicts and sets in it must be copied before being passed to the function"""
+    key = (func, raw_args)
+    binding = _req_function_bindings.get(key)
+    if binding is not None:
+        return binding
+
+    args = raw_args.split(",")
+    if args == ['']:
+        args.pop()
+
+    parameters = inspect.signature(func).parameters
+    knownParameters = [World, 'ManualWorld', MultiWorld, CollectionState]
+    index = -1
+    for parameter in parameters.values():
+        target_type = parameter.annotation
+        index += 1
+        if target_type in knownParameters:
+            if target_type in [World, 'ManualWorld']:
+                args.insert(index, FunctionArgument.WORLD)
+            elif target_type == MultiWorld:
+                args.insert(index, FunctionArgument.MULTIWORLD)
+            elif target_type == CollectionState:
+                args.insert(index, FunctionArgument.STATE)
+            continue
+        if parameter.name.lower() == "player":
+            args.insert(index, FunctionArgument.PLAYER)
+            continue
 
-            if index < len(args) and args[index] != "":
-                value = args[index].strip()
+        if index < len(args) and args[index] != "":
+            value = args[index].strip()
+        else:
+            if parameter.default is not inspect.Parameter.empty:
+                if index < len(args):
+                    args[index] = parameter.default
+                else:
+                    args.insert(index, parameter.default)
+                continue
             else:
-                if parameter.default is not inspect.Parameter.empty:
-                    if index < len(args):
-                        args[index] = parameter.default
-                    else:
-                        args.insert(index, parameter.default)
-                    continue
+                if parameter.annotation is inspect.Parameter.empty:
+                    raise Exception(f"A call of the \"{func.__name__}\" function in \"{areaName}\"'s requirement, asks for a value for its argument \"{parameter.name}\" but it's missing.")
                 else:
-                    if parameter.annotation is inspect.Parameter.empty:
-                        raise Exception(f"A call of the \"{func.__name__}\" function in \"{areaName}\"'s requirement, asks for a value for its argument \"{parameter.name}\" but it's missing.")
-                    else:
-                        raise Exception(f"A call of the \"{func.__name__}\" function in \"{areaName}\"'s requirement, asks for a value of type {target_type} for its argument \"{parameter.name}\" but it's missing.")
+                    raise Exception(f"A call of the \"{func.__name__}\" function in \"{areaName}\"'s requirement, asks for a value of type {target_type} for its argument \"{parameter.name}\" but it's missing.")
 
-            if target_type == str or parameter.annotation is inspect.Parameter.empty: #Don't convert since its already a string or if we don't know the type to convert to
-                args[index] = value
-                continue
+        if target_type == str or parameter.annotation is inspect.Parameter.empty: #Don't convert since its already a string or if we don't know the type to convert to
+            args[index] = value
+            continue
 
-            try:
-                value = convert_string_to_type(value, target_type)
+        try:
+            value = convert_string_to_type(value, target_type)
 
-            except Exception as e:
-                raise Exception(f"A call of the \"{func.__name__}\" function in \"{areaName}\"'s requirement, asks for a value of type {target_type}\nfor its argument \"{parameter.name}\" but its value \"{value}\" cannot be converted to {target_type} \nOriginal Error:'{e}'")
+        except Exception as e:
+            raise Exception(f"A call of the \"{func.__name__}\" function in \"{areaName}\"'s requirement, asks for a value of type {target_type}\nfor its argument \"{parameter.name}\" but its value \"{value}\" cannot be converted to {target_type} \nOriginal Error:'{e}'")
 
-            args[index] = value
+        args[index] = value
 
+    binding = tuple(args)
+    _req_function_bindings[key] = binding
+    return binding
 
 def ItemValue(state: CollectionState, player: int, valueCount: str):
     """When passed a string with this format: 'valueName:int',
@@ -431,8 +1014,7 @@ def OptOne(world: "ManualWorld", item: str, items_counts: Optional[dict] = None)
     if require_type == 'category':
         if item_count.isnumeric():
             #Only loop if we can use the result to clamp
-            category_items = [item for item in world.item_name_to_item.values() if "category" in item and item_name in item["category"]]
-            category_items_counts = sum([items_counts.get(category_item["name"], 0) for category_item in category_items])
+            category_items_counts = sum([items_counts.get(category_item, 0) for category_item in category_to_item_names.get(item_name, ())])
             item_count = clamp(int(item_count), 0, category_items_counts)
         return f"|@{item_name}:{item_count}|"
     elif require_type == 'item':
@@ -483,6 +1065,7 @@ def YamlDisabled(multiworld: MultiWorld, player: int, param: str) -> bool:
     """Is a yaml option disabled?"""
     return not is_option_enabled(multiworld, player, param)
 
+@ignores_state
 def YamlCompare(world: "ManualWorld", multiworld: MultiWorld, state: CollectionState, player: int, args: str, skipCache: bool = False) -> bool:
     """Is a yaml option's value compared using {comparator} to the requested value
     \nFormat it like {YamlCompare(OptionName==value)}
@@ -1,6 +1,7 @@
 from base64 import b64encode
 import logging
 import os
+from contextlib import nullcontext
 import json
 from typing import Callable, Optional, Counter
 import webbrowser
@@ -13,14 +14,17 @@ from .Data import item_table, location_table, region_table, category_table
 from .Game import game_name, filler_item_name, starting_items
 from .Meta import world_description, world_webworld, enable_region_diagram
 from .Locations import location_id_to_name, location_name_to_id, location_name_to_location, location_name_groups, victory_names
-from .Items import item_id_to_name, item_name_to_id, item_name_to_item, item_name_groups
+from .Items import item_id_to_name, item_name_to_id, item_name_to_item, item_name_groups, item_name_to_category_keys, get_item_names_in_categories
 from .DataValidation import runGenerationDataValidation, runPreFillDataValidation
 
 from .Regions import create_regions
 from .Items import ManualItem
-from .Rules import set_rules
+from .Rules import set_rules, build_requires_thresholds
+from .BatchRules import BatchRuleEvaluator
+from .Profiling import StageTimings, StageProfiler, timed_stage, is_profiling_enabled, dump_stage_profiles
 from .Options import manual_options_data
-from .Helpers import is_item_enabled, get_option_value, get_items_for_player, resolve_yaml_option, format_state_prog_items_key, ProgItemsCat
+from .Helpers import is_item_enabled, get_option_value, get_items_for_player, resolve_yaml_option, format_state_prog_items_key, ProgItemsCat, \
+    is_empty_function
 
 from BaseClasses import CollectionState, ItemClassification, Item
 from Options import PerGameCommonOptions
@@ -36,6 +40,10 @@ from .hooks.World import \
     before_extend_hint_information, after_extend_hint_information, \
     after_collect_item, after_remove_item
 from .hooks.Data import hook_interpret_slot_data
+from .DataCache import data_cache
+
+# Every table and lookup is built by now, cache them for the next import
+data_cache.save()
 
 class ManualWorld(World):
     __doc__ = world_description
@@ -60,6 +68,8 @@ class ManualWorld(World):
 
     item_counts: dict[int, Counter[str]] = {}
     item_counts_progression: dict[int, Counter[str]] = {}
+    requires_thresholds: dict[int, dict[tuple[str, str, str], int]] = {}
+    requires_thresholds_counts: dict[int, Counter[str]] = {} # the progression item counts requires_thresholds were computed from
     start_inventory = {}
 
     location_id_to_name = location_id_to_name
@@ -93,8 +103,10 @@ class ManualWorld(World):
         runGenerationDataValidation(cls)
 
 
+    @timed_stage
     def create_regions(self):
-        before_create_regions(self, self.multiworld, self.player)
+        with self.time_stage("before_create_regions"):
+            before_create_regions(self, self.multiworld, self.player)
 
         create_regions(self, self.multiworld, self.player)
 
@@ -107,8 +119,10 @@ class ManualWorld(World):
         location_game_complete.place_locked_item(
             ManualItem("__Victory__", ItemClassification.progression, None, player=self.player))
 
-        after_create_regions(self, self.multiworld, self.player)
+        with self.time_stage("after_create_regions"):
+            after_create_regions(self, self.multiworld, self.player)
 
+    @timed_stage
     def create_items(self):
         # Generate item pool
         pool: list[Item] = []
@@ -132,7 +146,8 @@ class ManualWorld(World):
 
             items_config[name] = item_count
 
-        items_config = before_create_items_all(items_config, self, self.multiworld, self.player)
+        with self.time_stage("before_create_items_all"):
+            items_config = before_create_items_all(items_config, self, self.multiworld, self.player)
 
         for name, configs in items_config.items():
             total_created = 0
@@ -191,7 +206,8 @@ class ManualWorld(World):
                     raise Exception(f"Item {name}'s 'local_early' has an invalid value of '{item['local_early']}'. \nA boolean or an integer was expected.")
 
 
-        pool = before_create_items_starting(pool, self, self.multiworld, self.player)
+        with self.time_stage("before_create_items_starting"):
+            pool = before_create_items_starting(pool, self, self.multiworld, self.player)
 
         items_started: list[Item] = []
 
@@ -216,7 +232,7 @@ class ManualWorld(World):
 
                 # if the setting lists specific item categories, limit the items to ones that have any of those categories
                 if "item_categories" in starting_item_block:
-                    items_in_categories = [item["name"] for item in self.item_name_to_item.values() if "category" in item and len(set(starting_item_block["item_categories"]).intersection(item["category"])) > 0]
+                    items_in_categories = get_item_names_in_categories(starting_item_block["item_categories"])
                     items = [item for item in pool if item.name in items_in_categories]
 
                 self.random.shuffle(items)
@@ -232,9 +248,11 @@ class ManualWorld(World):
 
         self.start_inventory = {i.name: items_started.count(i) for i in items_started}
 
-        pool = before_create_items_filler(pool, self, self.multiworld, self.player)
+        with self.time_stage("before_create_items_filler"):
+            pool = before_create_items_filler(pool, self, self.multiworld, self.player)
         pool = self.adjust_filler_items(pool, traps)
-        pool = after_create_items(pool, self, self.multiworld, self.player)
+        with self.time_stage("after_create_items"):
+            pool = after_create_items(pool, self, self.multiworld, self.player)
 
         # need to put all of the items in the pool so we can have a full state for placement
         # then will remove specific item placements below from the overall pool
@@ -243,6 +261,8 @@ class ManualWorld(World):
         real_pool = pool + items_started
         self.item_counts[self.player] = self.get_item_counts(pool=real_pool)
         self.item_counts_progression[self.player] = self.get_item_counts(pool=real_pool, only_progression=True)
+        self.requires_thresholds[self.player] = build_requires_thresholds(self)
+        self.requires_thresholds_counts[self.player] = Counter(self.item_counts_progression[self.player])
 
     def create_item(self, name: str, class_override: Optional['ItemClassification']=None) -> Item:
         name = before_create_item(name, self, self.multiworld, self.player)
@@ -271,34 +291,53 @@ class ManualWorld(World):
 
         return item_object
 
-    # Item Value need a tweaked collect and remove:
+    # Item Value, category counts and memoized rule results need a tweaked collect and remove:
     def collect(self, state: CollectionState, item: Item) -> bool:
         change = super().collect(state, item)
+        if change:
+            prog_items = state.prog_items[item.player]
+            for category_key in item_name_to_category_keys.get(item.name, ()):
+                prog_items[category_key] += 1
         manual_item = self.item_name_to_item.get(item.name, {})
         if change and manual_item.get("value"):
             for key, value in manual_item["value"].items():
                 state.prog_items[item.player][format_state_prog_items_key(ProgItemsCat.VALUE, key)] += int(value)
         after_collect_item(self, state, change, item)
+        # after the hook, so a rule it checked can't keep a result from before the item
+        if change and hasattr(self, 'rule_compiler'):
+            self.rule_compiler.forget_results(state, item)
         return change
 
     def remove(self, state: CollectionState, item: Item) -> bool:
         change = super().remove(state, item)
+        if change:
+            prog_items = state.prog_items[item.player]
+            for category_key in item_name_to_category_keys.get(item.name, ()):
+                prog_items[category_key] -= 1
         manual_item = self.item_name_to_item.get(item.name, {})
         if change and manual_item.get("value"):
             for key, value in manual_item["value"].items():
                 state.prog_items[item.player][format_state_prog_items_key(ProgItemsCat.VALUE, key)] -= int(value)
         after_remove_item(self, state, change, item)
+        # after the hook, so a rule it checked can't keep a result from before the item
+        if change and hasattr(self, 'rule_compiler'):
+            self.rule_compiler.forget_results(state, item)
         return change
 
+    @timed_stage
     def set_rules(self):
-        before_set_rules(self, self.multiworld, self.player)
+        with self.time_stage("before_set_rules"):
+            before_set_rules(self, self.multiworld, self.player)
 
         set_rules(self, self.multiworld, self.player)
 
-        after_set_rules(self, self.multiworld, self.player)
+        with self.time_stage("after_set_rules"):
+            after_set_rules(self, self.multiworld, self.player)
 
+    @timed_stage
     def generate_basic(self):
-        before_generate_basic(self, self.multiworld, self.player)
+        with self.time_stage("before_generate_basic"):
+            before_generate_basic(self, self.multiworld, self.player)
 
         # Handle item forbidding
         manual_locations_with_forbid = {location['name']: location for location in location_name_to_location.values() if "dont_place_item" in location or "dont_place_item_category" in location}
@@ -311,7 +350,7 @@ class ManualWorld(World):
                 forbidden_item_names.extend([i["name"] for i in item_name_to_item.values() if i["name"] in manual_location["dont_place_item"]])
 
             if manual_location.get("dont_place_item_category"):
-                forbidden_item_names.extend([i["name"] for i in item_name_to_item.values() if "category" in i and set(i["category"]).intersection(manual_location["dont_place_item_category"])])
+                forbidden_item_names.extend(get_item_names_in_categories(manual_location["dont_place_item_category"]))
 
             if forbidden_item_names:
                 forbid_items_for_player(location, set(forbidden_item_names), self.player)
@@ -333,7 +372,7 @@ class ManualWorld(World):
                 place_messages.append('", "'.join(manual_location["place_item"]))
 
             if manual_location.get("place_item_category"):
-                eligible_item_names += [i["name"] for i in item_name_to_item.values() if "category" in i and set(i["category"]).intersection(manual_location["place_item_category"])]
+                eligible_item_names += get_item_names_in_categories(manual_location["place_item_category"])
                 place_messages.append('", "'.join(manual_location["place_item_category"]) + " category(ies)")
 
             # Second we check for forbidden items names
@@ -342,7 +381,7 @@ class ManualWorld(World):
                 forbid_messages.append('", "'.join(manual_location["dont_place_item"]) + ' items')
 
             if manual_location.get("dont_place_item_category"):
-                forbidden_item_names += [i["name"] for i in item_name_to_item.values() if "category" in i and set(i["category"]).intersection(manual_location["dont_place_item_category"])]
+                forbidden_item_names += get_item_names_in_categories(manual_location["dont_place_item_category"])
                 forbid_messages.append('", "'.join(manual_location["dont_place_item_category"]) + ' category(ies)')
 
             # If we forbid some names, check for those in the possible names and remove them
@@ -365,19 +404,24 @@ class ManualWorld(World):
             self.multiworld.itempool.remove(item_to_place)
 
 
-        after_generate_basic(self, self.multiworld, self.player)
+        with self.time_stage("after_generate_basic"):
+            after_generate_basic(self, self.multiworld, self.player)
 
         # Enable this in Meta.json to generate a diagram of your manual.  Only works on 0.4.4+
         if enable_region_diagram:
             from Utils import visualize_regions
             visualize_regions(self.multiworld.get_region("Menu", self.player), f"{self.game}_{self.player}.puml")
 
+    @timed_stage
     def pre_fill(self):
         # DataValidation after all the hooks are done but before fill
         runPreFillDataValidation(self, self.multiworld)
 
+    # fill_slot_data runs alongside stage_generate_output, its profile wouldn't make it in the dumped files
+    @timed_stage(profiled=False, last=True)
     def fill_slot_data(self):
-        slot_data = before_fill_slot_data({}, self, self.multiworld, self.player)
+        with self.time_stage("before_fill_slot_data"):
+            slot_data = before_fill_slot_data({}, self, self.multiworld, self.player)
 
         # slot_data["DeathLink"] = bool(self.multiworld.death_link[self.player].value)
         common_options = set(PerGameCommonOptions.type_hints.keys())
@@ -386,7 +430,8 @@ class ManualWorld(World):
                 continue
             slot_data[option_key] = get_option_value(self.multiworld, self.player, option_key)
 
-        slot_data = after_fill_slot_data(slot_data, self, self.multiworld, self.player)
+        with self.time_stage("after_fill_slot_data"):
+            slot_data = after_fill_slot_data(slot_data, self, self.multiworld, self.player)
 
         return slot_data
 
@@ -396,9 +441,20 @@ class ManualWorld(World):
         with open(os.path.join(output_directory, filename), 'wb') as f:
             f.write(b64encode(bytes(json.dumps(data), 'utf-8')))
 
+    @classmethod
+    def stage_generate_output(cls, multiworld, output_directory: str):
+        # The players' generate_output can run at the same time as this, so the stage profiles of every player are dumped from here
+        dump_stage_profiles(list(multiworld.get_game_worlds(cls.game)), output_directory, f"AP_{multiworld.seed_name}_{cls.game}")
+
     def write_spoiler(self, spoiler_handle):
         before_write_spoiler(self, self.multiworld, spoiler_handle)
 
+        if hasattr(self, 'rule_compiler') and self.rule_compiler.profiler is not None:
+            self.rule_compiler.profiler.write_report(spoiler_handle, self.multiworld.get_player_name(self.player))
+
+        if hasattr(self, 'stage_timings') and self.stage_timings.report:
+            self.stage_timings.write_report(spoiler_handle)
+
     def extend_hint_information(self, hint_data: dict[int, dict[int, str]]) -> None:
         before_extend_hint_information(hint_data, self, self.multiworld, self.player)
 
@@ -421,6 +477,64 @@ class ManualWorld(World):
     The maximum time a location/region's requirement can loop to check for functions\n
     One thing to remember is the more you loop the longer generation will take. So probably leave it as is unless you really needs it."""
 
+    def time_stage(self, name: str):
+        """Context manager recording the time (and memory if tracemalloc is tracing) a generation stage or hook takes in self.stage_timings"""
+        if not hasattr(self, 'stage_timings'):
+            self.stage_timings = StageTimings(f"player {self.player} ({self.multiworld.get_player_name(self.player)})",
+                                              is_profiling_enabled(self, 'stage_timings_report', StageTimings.environment_variable))
+        return self.stage_timings.measure(name)
+
+    def profile_stage(self):
+        """Context manager running a generation stage under cProfile when stages_cprofiling is on, does nothing otherwise"""
+        if not hasattr(self, 'stage_profiler'):
+            self.stage_profiler = StageProfiler() if is_profiling_enabled(self, 'stages_cprofiling', StageProfiler.environment_variable) else None
+
+        if self.stage_profiler is None:
+            return nullcontext()
+        return self.stage_profiler.measure()
+
+    rules_memoization: bool = True
+    """Default: True\n
+    Remember the result of the requires of locations and regions in the state until an item they read is collected or removed.
+    It's turned off when after_collect_item or after_remove_item of hooks/World.py aren't empty anymore, since they could change
+    what the requires read without Manual knowing. Set this to False to always turn it off."""
+
+    def are_rules_memoized(self) -> bool:
+        """Can the results of the requires be remembered in the state, see rules_memoization"""
+        return self.rules_memoization and is_empty_function(after_collect_item) and is_empty_function(after_remove_item)
+
+    rules_profiling: bool = False
+    """Default: False\n
+    Record the call count, time and true/false ratio of every location, entrance and requirement function rule,
+    the report gets written in the spoiler. Can also be turned on with the MANUAL_RULES_PROFILING environment variable.\n
+    This slows down generation, only use it to find what in your requires takes the most time."""
+
+    stage_timings_report: bool = False
+    """Default: False\n
+    Trace the memory the generation stages and their hooks allocate with tracemalloc, write their timings in the spoiler
+    and summarize them in the log at the info level. Can also be turned on with the MANUAL_STAGE_TIMINGS environment variable.\n
+    The timings are always recorded in self.stage_timings, this only reports them. Tracing the memory slows down generation."""
+
+    stages_cprofiling: bool = False
+    """Default: False\n
+    Run create_regions, create_items, set_rules, generate_basic and pre_fill under cProfile.
+    A .pstats file per player and one with every player merged get added to the output, open them with pstats or snakeviz.
+    Can also be turned on with the MANUAL_STAGES_CPROFILE environment variable."""
+
+    force_data_validation: bool = False
+    """Default: False\n
+    The generation data validation is skipped when it already passed for the same data files, hooks and validators.
+    Set this to True, or the MANUAL_FORCE_VALIDATION environment variable, to run it every generation anyway."""
+
+    def get_location_access_mask(self, state: CollectionState) -> dict[str, bool]:
+        """Returns whether each location of the player can be reached with this state, the locations are all checked at once.\n
+        Uses numpy when it's installed, only works after set_rules. Generation doesn't call it, it's there for hooks and trackers."""
+        if not hasattr(self, 'batch_rule_evaluator'):
+            self.batch_rule_evaluator = BatchRuleEvaluator(self)
+
+        evaluator = self.batch_rule_evaluator
+        return dict(zip([location.name for location in evaluator.locations], evaluator.evaluate(state)))
+
     def add_filler_items(self, item_pool, traps):
         Utils.deprecate("Use adjust_filler_items instead.")
         return self.adjust_filler_items(item_pool, traps)
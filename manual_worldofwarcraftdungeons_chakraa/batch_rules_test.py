@@ -0,0 +1,82 @@
+from unittest.mock import patch
+
+from BaseClasses import CollectionState
+
+from . import BatchRules
+from .BatchRules import BatchRuleEvaluator
+from .Rules import RequiresArea
+from .rules_test import ReferenceRulesTestBase
+
+
+class BatchRulesTest(ReferenceRulesTestBase):
+    """Check the batch evaluator against location.can_reach, with the locations given random requires"""
+
+    def random_requirement(self) -> str:
+        rng = self.get_random()
+        roll = rng.random()
+        if roll < 0.15:
+            requirement = rng.choice([f"|@{self.crystal_category}:ALL|", f"|@{self.crystal_category}:HALF|", f"|{self.crystal_name}:50%|",
+                                      "|@Dungeons:25%|", f"|{self.get_item_names()[0]}:ALL|"])
+        elif roll < 0.2:
+            requirement = f"|@{self.empty_category}:{rng.choice(['ALL', '1', '0'])}|"
+        else:
+            requirement = super().random_requirement()
+        return f"!{requirement}" if rng.random() < 0.15 else requirement
+
+    def random_requires(self, depth: int) -> str:
+        requires = super().random_requires(depth)
+        return f"!{requires}" if requires.startswith("(") and self.get_random().random() < 0.15 else requires
+
+    def set_random_rules(self):
+        """Give the locations random compiled requires, some of them made too big for the evaluator or changed like a hook would"""
+        rng = self.get_random()
+        compiler = self.world.rule_compiler
+        item_names = self.get_item_names()
+        # 2^9 terms, more than the evaluator takes
+        too_many_terms = " and ".join(f"(|{item_names[0]}:{index + 1}| or |{item_names[1]}:{index + 1}|)" for index in range(9))
+
+        for location in self.multiworld.get_locations(self.player):
+            roll = rng.random()
+            if roll < 0.05:
+                location.access_rule = lambda state, item_name=rng.choice(item_names): state.has(item_name, self.player)
+                continue
+
+            requires = too_many_terms if roll < 0.1 else self.random_requires(3)
+            area = RequiresArea(location.name, False, requires)
+            rule = compiler.compile_area(area)
+            location.access_rule = rule
+            compiler.location_areas[location.name] = (rule, (area,))
+
+    def get_states(self) -> list[CollectionState]:
+        states = self.random_states(15)
+        crystals = self.world.get_item_counts(self.player, only_progression=True)[self.crystal_name]
+        for count in (crystals // 2, crystals):
+            state = CollectionState(self.multiworld)
+            for item_name in [self.crystal_name] * count + self.get_item_names()[:-1]:
+                state.collect(self.world.create_item(item_name), True)
+            states.append(state)
+        return states
+
+    def assertBatchEvaluation(self):
+        self.set_random_rules()
+        evaluator = BatchRuleEvaluator(self.world)
+        self.assertTrue(evaluator.fallback_locations)
+        self.assertLess(len(evaluator.fallback_locations), len(evaluator.locations))
+
+        for state in self.get_states():
+            self.assertEqual(evaluator.evaluate(state), [location.can_reach(state) for location in evaluator.locations])
+
+    def test_evaluate(self):
+        if BatchRules.numpy is None:
+            self.skipTest("numpy is not installed")
+        self.assertBatchEvaluation()
+
+    def test_evaluate_without_numpy(self):
+        with patch.object(BatchRules, "numpy", None):
+            self.assertBatchEvaluation()
+
+    def test_location_access_mask(self):
+        self.set_random_rules()
+        for state in self.get_states():
+            mask = self.world.get_location_access_mask(state)
+            self.assertEqual(mask, {location.name: location.can_reach(state) for location in self.multiworld.get_locations(self.player)})
@@ -0,0 +1,240 @@
+# Fixture generator, it writes synthetic items.json, locations.json, regions.json and categories.json shaped like this manual's
+# but as big and as tangled as asked, to find where the rules, create_regions and the data validation stop scaling.
+#
+# It only needs the standard library, run it from anywhere:
+#   python -m worlds.manual_worldofwarcraftdungeons_chakraa.benchmarks.Fixtures /tmp/manual_100k --locations 100000 --depth 3 --shape tree
+#   python path/to/benchmarks/Fixtures.py /tmp/manual_10k
+#
+# Then load the fixture in place of data/ by setting MANUAL_DATA_DIR before Archipelago imports the world, the files the fixture
+# doesn't have (game.json, ...) still come from data/. For the generation benchmarks, --data-dir does it for you:
+#   python -m worlds.manual_worldofwarcraftdungeons_chakraa.benchmarks.Generation --data-dir /tmp/manual_100k --players 1
+
+from argparse import ArgumentParser
+from typing import Any, Callable, Optional
+import json
+import logging
+import math
+import os
+import random
+
+# The categories the hooks pick dungeons from, each with the yaml option that turns it on
+expansions = {
+    "Classic/Cataclysm": "include_classic_cataclysm",
+    "The Burning Crusade": "include_the_burning_crusade",
+    "Wrath of the Lich King": "include_wrath_of_the_lich_king",
+    "Mists of Pandaria": "include_mists_of_pandaria",
+    "Warlords of Draenor": "include_warlords_of_draenor",
+    "Legion": "include_legion",
+    "Battle for Azeroth": "include_battle_for_azeroth",
+    "Shadowlands": "include_shadowlands",
+    "Dragonflight": "include_dragonflight",
+}
+
+region_shapes = ["single", "chain", "tree", "star", "random"]
+
+# The requirement functions the requires can use, ItemValue gives the Apexis Crystals a value
+requirement_functions = ["YamlEnabled", "YamlDisabled", "YamlCompare", "OptOne", "ItemValue", "canReachLocation"]
+default_functions = ["YamlEnabled", "YamlDisabled", "YamlCompare", "OptOne"]
+
+crystal_name = "Apexis Crystal"
+crystal_value_name = "Crystals"
+victory_name = "Victory - All Apexis Crystals Found!"
+
+def get_location_name(dungeon: str, number: int) -> str:
+    return f"{dungeon} - Item {number:02d}"
+
+class FixtureBuilder:
+    """Build the tables of a synthetic manual.\n
+    Every dungeon is an item with its own locations that require it, like in data/, so the hooks can still pick the dungeons.
+    The extra requires are or-ed with something that can always be met, which keeps every seed beatable however tangled they are."""
+
+    def __init__(self, locations: int = 10000, items_per_dungeon: int = 10, regions: int = 1, shape: str = "single",
+                 depth: int = 2, width: int = 3, category_chance: float = 0.3, function_chance: float = 0.1,
+                 functions: Optional[list[str]] = None, groups: int = 20, crystals: int = 100, seed: int = 1):
+        if shape not in region_shapes:
+            raise ValueError(f"Unknown region shape '{shape}', it should be one of {', '.join(region_shapes)}")
+        unknown_functions = set(functions or ()) - set(requirement_functions)
+        if unknown_functions:
+            raise ValueError(f"Unknown requirement function(s) {', '.join(sorted(unknown_functions))}")
+
+        self.dungeon_count = max(1, math.ceil(locations / items_per_dungeon))
+        self.items_per_dungeon = items_per_dungeon
+        self.region_count = max(1, regions) if shape != "single" else 0
+        self.shape = shape
+        self.depth = depth
+        self.width = max(2, width)
+        self.category_chance = category_chance
+        self.function_chance = function_chance
+        self.functions = list(default_functions if functions is None else functions)
+        self.group_count = groups
+        self.crystals = crystals
+        self.random = random.Random(seed)
+
+        self.dungeons = [f"Dungeon {index:0{len(str(self.dungeon_count))}d}" for index in range(1, self.dungeon_count + 1)]
+        self.groups = [f"Fixture Group {index}" for index in range(1, groups + 1)]
+
+    def build(self) -> dict[str, Any]:
+        """Returns the content of each data file, by file name"""
+        return {
+            "categories.json": self.build_categories(),
+            "items.json": self.build_items(),
+            "locations.json": self.build_locations(),
+            "regions.json": self.build_regions(),
+        }
+
+    def build_categories(self) -> dict[str, dict]:
+        categories: dict[str, dict] = {name: {"hidden": True} for name in ("Dungeons", "Free to Play", "Filler")}
+        categories.update({name: {"yaml_option": [option]} for name, option in expansions.items()})
+        categories.update({name: {"hidden": True} for name in self.groups})
+        return categories
+
+    def get_expansion(self, dungeon_index: int) -> str:
+        return list(expansions)[dungeon_index % len(expansions)]
+
+    def build_items(self) -> list[dict]:
+        crystal: dict[str, Any] = {"name": crystal_name, "category": ["Apexis Crystals"], "count": self.crystals, "progression": True}
+        if "ItemValue" in self.functions:
+            crystal["value"] = {crystal_value_name: 1}
+        items = [crystal]
+
+        for index, dungeon in enumerate(self.dungeons):
+            categories = ["Dungeons", self.get_expansion(index)]
+            if index % 2 == 0:
+                categories.append("Free to Play")
+            if self.groups and self.random.random() < self.category_chance:
+                categories.append(self.random.choice(self.groups))
+            items.append({"name": dungeon, "category": categories, "count": 1, "progression": True})
+        return items
+
+    def build_locations(self) -> list[dict]:
+        locations = [{"name": victory_name, "region": "Goal", "victory": True, "category": ["Win Condition"], "requires": []}]
+
+        for index, dungeon in enumerate(self.dungeons):
+            region = self.get_region_name(index % self.region_count) if self.region_count else None
+            for number in range(1, self.items_per_dungeon + 1):
+                requires = f"|{dungeon}|"
+                if self.depth > 0:
+                    extra = self.random_expression(self.depth, dungeon, get_location_name(dungeon, 1) if number > 1 else None)
+                    requires = f"{requires} and ({extra} or |{dungeon}|)"
+
+                location: dict[str, Any] = {"name": get_location_name(dungeon, number), "category": [self.get_expansion(index)], "requires": requires}
+                if region is not None:
+                    location["region"] = region
+                locations.append(location)
+        return locations
+
+    def get_region_name(self, index: int) -> str:
+        return f"Zone {index + 1:0{len(str(self.region_count))}d}"
+
+    def get_region_connections(self) -> list[list[int]]:
+        count = self.region_count
+        connections: list[list[int]] = [[] for _ in range(count)]
+        for index in range(1, count):
+            if self.shape == "chain":
+                parent = index - 1
+            elif self.shape == "tree":
+                parent = (index - 1) // 2
+            elif self.shape == "star":
+                parent = 0
+            else:
+                parent = self.random.randrange(index)
+            connections[parent].append(index)
+
+        if self.shape == "random":
+            # some shortcuts and loops on top of the spanning tree
+            for _ in range(count // 4):
+                source, target = self.random.randrange(count), self.random.randrange(count)
+                if source != target and target not in connections[source]:
+                    connections[source].append(target)
+        return connections
+
+    def build_regions(self) -> dict[str, dict]:
+        regions: dict[str, dict] = {"Goal": {"starting": True, "connects_to": [], "requires": "|@Apexis Crystals:ALL|"}}
+
+        for index, targets in enumerate(self.get_region_connections()):
+            region: dict[str, Any] = {"connects_to": [self.get_region_name(target) for target in targets]}
+            if index == 0:
+                region["starting"] = True
+            else:
+                # a dungeon item is always precollected by the hooks so any region can be entered from the start
+                region["requires"] = "|@Dungeons:1|"
+                if self.depth > 0:
+                    region["requires"] = f"{self.random_expression(self.depth, None, None)} or |@Dungeons:1|"
+            regions[self.get_region_name(index)] = region
+        return regions
+
+    def random_expression(self, depth: int, dungeon: Optional[str], first_location: Optional[str]) -> str:
+        """A requires of nested and/or up to depth levels deep, over items, categories and requirement functions"""
+        if depth <= 0 or self.random.random() < 0.3:
+            return self.random_requirement(dungeon, first_location)
+
+        operator = self.random.choice([" and ", " or "])
+        parts = [self.random_expression(depth - 1, dungeon, first_location) for _ in range(self.random.randint(2, self.width))]
+        return f"({operator.join(parts)})"
+
+    def random_requirement(self, dungeon: Optional[str], first_location: Optional[str]) -> str:
+        roll = self.random.random()
+        if self.functions and roll < self.function_chance:
+            return self.random_function(dungeon, first_location)
+
+        if roll < self.function_chance + self.category_chance:
+            category_requirements: list[Callable[[], str]] = [
+                lambda: f"|@Dungeons:{self.random.randint(1, 5)}|",
+                lambda: f"|@{self.random.choice(list(expansions))}:1|",
+            ]
+            if self.groups:
+                category_requirements.append(lambda: f"|@{self.random.choice(self.groups)}:1|")
+            return self.random.choice(category_requirements)()
+
+        if self.random.random() < 0.2:
+            return f"|{crystal_name}:{self.random.randint(1, 10)}|"
+        return f"|{self.random.choice(self.dungeons)}|"
+
+    def random_function(self, dungeon: Optional[str], first_location: Optional[str]) -> str:
+        name = self.random.choice(self.functions)
+        if name in ("YamlEnabled", "YamlDisabled"):
+            return f"{{{name}({self.random.choice(list(expansions.values()))})}}"
+        if name == "YamlCompare":
+            return f"{{YamlCompare(amount_of_dungeons {self.random.choice(['>=', '<', '==', '!='])} {self.random.randint(1, 50)})}}"
+        if name == "OptOne":
+            return f"{{OptOne(|{self.random.choice(self.dungeons)}|)}}"
+        if name == "ItemValue":
+            return f"{{ItemValue({crystal_value_name}:1)}}"
+        # only the other locations of the same dungeon, a location reaching itself would never end
+        if first_location is None:
+            return f"|{dungeon or self.random.choice(self.dungeons)}|"
+        return f"{{canReachLocation({first_location})}}"
+
+def write_fixture(directory: str, files: dict[str, Any]):
+    os.makedirs(directory, exist_ok=True)
+    for file_name, content in files.items():
+        with open(os.path.join(directory, file_name), "w", encoding="utf-8") as file:
+            json.dump(content, file, indent=2)
+
+def main(args: Optional[list[str]] = None) -> int:
+    parser = ArgumentParser(description="Write a synthetic manual data folder to benchmark big manuals with")
+    parser.add_argument("directory", help="the folder to write the data files to")
+    parser.add_argument("--locations", type=int, default=10000, help="about how many locations, rounded up to whole dungeons")
+    parser.add_argument("--items-per-dungeon", type=int, default=10, help="how many locations each dungeon item unlocks")
+    parser.add_argument("--regions", type=int, default=1, help="how many regions the dungeons are spread over, unless the shape is single")
+    parser.add_argument("--shape", choices=region_shapes, default="single", help="how the regions connect, single puts every location in the default region like data/ does")
+    parser.add_argument("--depth", type=int, default=2, help="how deep the extra requires of each location and region nest, 0 for none")
+    parser.add_argument("--width", type=int, default=3, help="the most operands of each and/or")
+    parser.add_argument("--category-chance", type=float, default=0.3, help="the chance a requirement is a category, and an item is in a fixture group")
+    parser.add_argument("--function-chance", type=float, default=0.1, help="the chance a requirement is a requirement function")
+    parser.add_argument("--functions", nargs="*", choices=requirement_functions, default=default_functions, help="the requirement functions to use")
+    parser.add_argument("--groups", type=int, default=20, help="how many extra item categories there are")
+    parser.add_argument("--crystals", type=int, default=100, help="how many Apexis Crystals there are")
+    parser.add_argument("--seed", type=int, default=1)
+    parsed = parser.parse_args(args)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    builder = FixtureBuilder(parsed.locations, parsed.items_per_dungeon, parsed.regions, parsed.shape, parsed.depth, parsed.width,
+                             parsed.category_chance, parsed.function_chance, parsed.functions, parsed.groups, parsed.crystals, parsed.seed)
+    files = builder.build()
+    write_fixture(parsed.directory, files)
+    logging.info(f"Wrote {len(files['items.json'])} items, {len(files['locations.json'])} locations and {len(files['regions.json'])} regions to {parsed.directory}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
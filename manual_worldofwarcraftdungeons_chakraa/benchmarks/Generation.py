@@ -0,0 +1,207 @@
+# Generation benchmarks, they build MultiWorlds of this manual and run every generation stage and the fill offline.
+#
+# Run them from the root of an Archipelago source checkout with this apworld in worlds/, for example:
+#   python -m worlds.manual_worldofwarcraftdungeons_chakraa.benchmarks.Generation --players 1 10 --save local
+#   python -m worlds.manual_worldofwarcraftdungeons_chakraa.benchmarks.Generation --players 1 10 --compare local
+#
+# Baselines are JSON files saved in the baselines folder next to this file (or at the path given).
+#
+# To benchmark a synthetic manual written by Fixtures.py instead of data/, add --data-dir with the folder it was written to.
+#
+# To see what the memoization of the requires results saves in the fill, compare a run without it to one with it:
+#   python -m worlds.manual_worldofwarcraftdungeons_chakraa.benchmarks.Generation --players 1 10 --no-memory --save memoized
+#   python -m worlds.manual_worldofwarcraftdungeons_chakraa.benchmarks.Generation --players 1 10 --no-memory --no-rule-memo --compare memoized
+
+from argparse import ArgumentParser, Namespace
+from typing import Any, Optional
+import itertools
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from BaseClasses import CollectionState, MultiWorld
+from Fill import distribute_items_restrictive
+from worlds.AutoWorld import AutoWorldRegister, World, call_all, call_stage
+
+from ..Game import game_name
+from ..Helpers import DATA_DIRECTORY_ENVIRONMENT_VARIABLE
+
+player_counts = [1, 10, 50, 200]
+
+# Every combination of these values is benchmarked, options not in here keep their default value
+options_matrix: dict[str, list[Any]] = {
+    "gamemode": ["free_to_play", "all"],
+    "amount_of_dungeons": [1, 10, 50],
+    "items_per_dungeon": [1, 4, 10],
+    "apexis_crystals": [1, 10, 100],
+}
+
+# In the order Main.py calls them, the ones the running Archipelago doesn't have are skipped
+generation_steps = ["generate_early", "create_regions", "create_items", "set_rules", "connect_entrances", "generate_basic", "pre_fill"]
+
+baselines_directory = os.path.join(os.path.dirname(__file__), "baselines")
+
+def get_options_combinations(matrix: dict[str, list[Any]]) -> list[dict[str, Any]]:
+    names = list(matrix.keys())
+    return [dict(zip(names, values)) for values in itertools.product(*matrix.values())]
+
+def setup_multiworld(players: int, options: dict[str, Any], seed: int) -> MultiWorld:
+    """Build a MultiWorld where every player plays this manual with the given options, like Main.py does from yamls"""
+    world_type = AutoWorldRegister.world_types[game_name]
+
+    multiworld = MultiWorld(players)
+    multiworld.game = {player: game_name for player in multiworld.player_ids}
+    multiworld.player_name = {player: f"Player{player}" for player in multiworld.player_ids}
+    multiworld.set_seed(seed)
+
+    args = Namespace()
+    for name, option in world_type.options_dataclass.type_hints.items():
+        value = option.from_any(options[name]) if name in options else option.from_any(option.default)
+        setattr(args, name, {player: value for player in multiworld.player_ids})
+    multiworld.set_options(args)
+    multiworld.state = CollectionState(multiworld)
+    return multiworld
+
+def run_generation(players: int, options: dict[str, Any], seed: int, trace_memory: bool = True) -> dict[str, Any]:
+    """Generate a seed and return how long each stage took, the fill included, and the peak traced memory"""
+    result: dict[str, Any] = {"players": players, "options": options, "seed": seed, "data": get_data_directory(), "stages": {},
+                              "rules_memoization": AutoWorldRegister.world_types[game_name].rules_memoization}
+
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        stage_start = time.perf_counter()
+        multiworld = setup_multiworld(players, options, seed)
+        call_stage(multiworld, "assert_generate")
+        result["stages"]["setup"] = time.perf_counter() - stage_start
+
+        for step in generation_steps:
+            if not hasattr(World, step):
+                continue
+            stage_start = time.perf_counter()
+            call_all(multiworld, step)
+            result["stages"][step] = time.perf_counter() - stage_start
+
+        stage_start = time.perf_counter()
+        distribute_items_restrictive(multiworld)
+        call_all(multiworld, "post_fill")
+        result["stages"]["fill"] = time.perf_counter() - stage_start
+    except Exception as ex:
+        result["error"] = f"{type(ex).__name__}: {ex}"
+    finally:
+        result["total"] = time.perf_counter() - start
+        if trace_memory:
+            result["peak_memory"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    return result
+
+def get_data_directory() -> Optional[str]:
+    """The folder the data files were loaded from instead of data/, if any"""
+    return os.environ.get(DATA_DIRECTORY_ENVIRONMENT_VARIABLE) or None
+
+def get_run_key(result: dict[str, Any]) -> str:
+    return json.dumps({"players": result["players"], "options": result["options"], "seed": result["seed"], "data": result.get("data")}, sort_keys=True)
+
+def get_baseline_path(name: str) -> str:
+    if os.path.sep in name or name.endswith(".json"):
+        return name
+    return os.path.join(baselines_directory, f"{name}.json")
+
+def save_baseline(name: str, results: list[dict[str, Any]], trace_memory: bool):
+    path = get_baseline_path(name)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"trace_memory": trace_memory, "results": results}, file, indent=2)
+    logging.info(f"Saved {len(results)} generation benchmark result(s) to {path}")
+
+def compare_to_baseline(name: str, results: list[dict[str, Any]], trace_memory: bool, threshold: float) -> list[str]:
+    """Returns a line for each run and stage of the results that's more than threshold (0.1 = 10%) slower than in the baseline"""
+    with open(get_baseline_path(name), encoding="utf-8") as file:
+        baseline = json.load(file)
+
+    if baseline.get("trace_memory") != trace_memory:
+        logging.warning("The baseline and these results weren't both run with memory tracing on (or off), their timings don't compare well.")
+
+    baseline_results = {get_run_key(result): result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        previous = baseline_results.get(get_run_key(result))
+        if previous is None:
+            continue
+
+        title = f"{result['players']} player(s) {result['options']}"
+        timings = {**result["stages"], "total": result["total"]}
+        previous_timings = {**previous["stages"], "total": previous["total"]}
+        for stage, seconds in timings.items():
+            previous_seconds = previous_timings.get(stage)
+            if not previous_seconds:
+                continue
+            change = seconds / previous_seconds - 1
+            line = f"{title} {stage}: {previous_seconds * 1000:.1f} ms -> {seconds * 1000:.1f} ms ({change:+.1%})"
+            logging.info(line)
+            if change > threshold:
+                regressions.append(line)
+
+        if result.get("peak_memory") and previous.get("peak_memory"):
+            logging.info(f"{title} peak memory: {previous['peak_memory'] / 1048576:.1f} MiB -> {result['peak_memory'] / 1048576:.1f} MiB")
+
+    return regressions
+
+def run_benchmarks(players: list[int], matrix: dict[str, list[Any]], seed: int, trace_memory: bool) -> list[dict[str, Any]]:
+    results = []
+    for player_count in players:
+        for options in get_options_combinations(matrix):
+            result = run_generation(player_count, options, seed, trace_memory)
+            if "error" in result:
+                logging.warning(f"{player_count} player(s) {options} failed: {result['error']}")
+            else:
+                logging.info(f"{player_count} player(s) {options}: {result['total']:.2f} s")
+            results.append(result)
+    return results
+
+def main(args: Optional[list[str]] = None) -> int:
+    parser = ArgumentParser(description=f"Benchmark the generation of {game_name}")
+    parser.add_argument("--players", type=int, nargs="+", default=player_counts, help="the player counts to benchmark")
+    parser.add_argument("--defaults-only", action="store_true", help="only benchmark the default options instead of the whole options matrix")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-memory", action="store_true", help="don't trace the memory, tracemalloc slows generation down")
+    parser.add_argument("--save", metavar="BASELINE", help="save the results as a baseline, a name in the baselines folder or a path to a .json")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare the results to a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.1, help="how much slower a stage has to be to count as a regression, 0.1 is 10%%")
+    parser.add_argument("--no-rule-memo", action="store_true", help="don't memoize the results of the requires, see ManualWorld.rules_memoization")
+    parser.add_argument("--data-dir", help="load the data files from this folder instead of data/, eg. a fixture written by Fixtures.py")
+    parsed = parser.parse_args(args)
+
+    # the data files are loaded when the world is imported, so another process has to do the benchmarks
+    if parsed.data_dir and os.path.abspath(parsed.data_dir) != get_data_directory():
+        environment = {**os.environ, DATA_DIRECTORY_ENVIRONMENT_VARIABLE: os.path.abspath(parsed.data_dir)}
+        return subprocess.run([sys.executable, "-m", __spec__.name, *(sys.argv[1:] if args is None else args)], env=environment).returncode
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if parsed.no_rule_memo:
+        AutoWorldRegister.world_types[game_name].rules_memoization = False
+    matrix = {} if parsed.defaults_only else options_matrix
+    trace_memory = not parsed.no_memory
+    results = run_benchmarks(parsed.players, matrix, parsed.seed, trace_memory)
+
+    if parsed.save:
+        save_baseline(parsed.save, results, trace_memory)
+
+    if parsed.compare:
+        regressions = compare_to_baseline(parsed.compare, results, trace_memory, parsed.threshold)
+        if regressions:
+            logging.warning(f"{len(regressions)} stage(s) got slower than the baseline by more than {parsed.threshold:.0%}:")
+            for line in regressions:
+                logging.warning(f"    {line}")
+            return 1
+
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,227 @@
+# Microbenchmarks of the requires parser and evaluator primitives, so optimizing one can be judged without a whole generation.
+#
+# Each primitive runs over a corpus made from the requires of the loaded data (data/ or MANUAL_DATA_DIR) and over synthetic worst
+# cases, from the root of an Archipelago source checkout with this apworld in worlds/:
+#   python -m worlds.manual_worldofwarcraftdungeons_chakraa.benchmarks.Primitives
+#   python -m worlds.manual_worldofwarcraftdungeons_chakraa.benchmarks.Primitives --only infix_to_postfix evaluate_postfix --save /tmp/before.json
+#
+# The speed is measured with tracemalloc off, the allocations are measured on a separate pass over the corpus with it on.
+#
+# parse_requires_string drops the requires from the parse cache before each call, parse_requires_string_cached doesn't.
+# compile_requires_string and compiled_rule use the rule compiler of the same world as below, on the requires it can compile.
+#
+# location_can_reach and location_access_mask both check every location of a player generated up to set_rules with the default
+# options, one by one with their access rule and all at once with ManualWorld.get_location_access_mask.
+
+from argparse import ArgumentParser
+from typing import TYPE_CHECKING, Any, Callable, Optional
+import json
+import logging
+import re
+import time
+import tracemalloc
+
+from BaseClasses import CollectionState, Location
+from worlds.AutoWorld import World, call_all
+
+from .. import Rules
+from ..Data import location_table, region_table
+from ..Helpers import convert_string_to_type
+from ..Rules import FUNCTION_PATTERN, ITEM_PATTERN, RequiresArea, RuleCompiler, infix_to_postfix, evaluate_postfix, parse_requires_string,\
+    fold_constants, get_function_nodes, YamlCompare
+from .Generation import setup_multiworld, generation_steps
+
+if TYPE_CHECKING:
+    from .. import ManualWorld
+
+AND_PATTERN = re.compile(r'\s*\bAND\b\s*', re.IGNORECASE)
+OR_PATTERN = re.compile(r'\s*\bOR\b\s*', re.IGNORECASE)
+
+# The worst cases are made of this many items, functions or nesting levels
+worst_case_size = 500
+
+# (text, type) pairs like the ones requirement function arguments and yaml values get converted with
+conversions: list[tuple[str, Any]] = [
+    ("5", int),
+    (" 42 ", int|str),
+    ("Deadmines", int|str),
+    ("true", bool),
+    ("off", Optional[bool]),
+    ("none", Optional[int]),
+    ("50%", str),
+    ("[1, 2, 3]", list[int]),
+    ("{'a': 1}", dict[str, int]),
+    ("maybe", int|bool),
+]
+
+yaml_comparisons = [
+    "amount_of_dungeons >= 5",
+    "amount_of_dungeons < 20",
+    "items_per_dungeon == 4",
+    "apexis_crystals != 10",
+    "gamemode == all",
+    "gamemode = free_to_play",
+    "include_legion == true",
+    "!include_dragonflight == false",
+]
+
+def get_requires_corpus() -> list[str]:
+    """The requires strings of the loaded locations and regions"""
+    areas = [*location_table, *region_table.values()]
+    return [area["requires"] for area in areas if isinstance(area.get("requires"), str) and area["requires"].strip()]
+
+def get_worst_cases() -> list[str]:
+    count = worst_case_size
+    return [
+        # long flat chains
+        " or ".join(f"|Item {index}|" for index in range(count)),
+        " and ".join(f"|@Category {index}:{index % 10 + 1}|" for index in range(count)),
+        # deep nesting
+        "(" * count + "|A|" + " and |B|)" * count,
+        "(" * count + "|@C:50%|" + " or !|D:ALL|)" * count,
+        # many requirement functions, some with items in their arguments
+        " or ".join(f"{{OptOne(|Item {index}:2|)}} and {{YamlEnabled(option_{index})}}" for index in range(count // 2)),
+    ]
+
+def to_infix(requires: str) -> str:
+    """Turn a requires into the 1/&/|/! expression infix_to_postfix expects, like the evaluator used to"""
+    expression = FUNCTION_PATTERN.sub("1", requires)
+    expression = ITEM_PATTERN.sub("1", expression)
+    expression = AND_PATTERN.sub("&", expression)
+    return OR_PATTERN.sub("|", expression)
+
+def scan_requires(requires: str) -> int:
+    return len(FUNCTION_PATTERN.findall(requires)) + len(ITEM_PATTERN.findall(requires))
+
+def parse_uncached(requires: str, area: RequiresArea) -> tuple:
+    Rules._parsed_requires.pop(requires, None)
+    return parse_requires_string(requires, area)
+
+def get_fold_values(tree: tuple) -> dict[tuple, bool]:
+    """Alternately true and false results for the functions of a parsed requires, like the ones that don't use the state get"""
+    return {node: index % 2 == 0 for index, node in enumerate(get_function_nodes(tree))}
+
+def get_compilable_areas(compiler: RuleCompiler, areas: list[RequiresArea]) -> list[RequiresArea]:
+    """The areas whose requires the compiler can compile, the worst cases call functions with items and options this manual doesn't have"""
+    compilable = []
+    for area in areas:
+        try:
+            compiler.compile_requires_string(area.requires, area)
+        except Exception:
+            continue
+        compilable.append(area)
+    return compilable
+
+def evaluate_rule(rule: Callable[[CollectionState], bool], state: CollectionState) -> bool:
+    return rule(state)
+
+def get_rules_world() -> "ManualWorld":
+    """A world with the default options, generated up to set_rules so its locations have their access rules"""
+    multiworld = setup_multiworld(1, {}, 1)
+    for step in generation_steps[:generation_steps.index("set_rules") + 1]:
+        if hasattr(World, step):
+            call_all(multiworld, step)
+    return multiworld.worlds[1]
+
+def check_every_location(locations: list[Location], state: CollectionState) -> list[bool]:
+    return [location.can_reach(state) for location in locations]
+
+def get_benchmarks() -> dict[str, tuple[Callable, list[tuple]]]:
+    """The primitives to benchmark, by name, with the arguments of each call of their corpus"""
+    corpus = get_requires_corpus() + get_worst_cases()
+    infix_corpus = [to_infix(requires) for requires in corpus]
+    postfix_corpus = [infix_to_postfix(infix, "benchmark") for infix in infix_corpus]
+    areas = [RequiresArea(f"benchmark {index}", False, requires) for index, requires in enumerate(corpus)]
+    trees = [parse_requires_string(area.requires, area) for area in areas]
+
+    world = get_rules_world()
+    locations = list(world.multiworld.get_locations(world.player))
+    state = world.multiworld.state
+    compiler = world.rule_compiler
+    compilable_areas = get_compilable_areas(compiler, areas)
+    rules = [compiler.compile_requires_string(area.requires, area) for area in compilable_areas]
+    conversion_corpus = conversions * max(1, len(corpus) // len(conversions))
+
+    return {
+        "regex_scan": (scan_requires, [(requires,) for requires in corpus]),
+        "infix_to_postfix": (infix_to_postfix, [(infix, "benchmark") for infix in infix_corpus]),
+        "evaluate_postfix": (evaluate_postfix, [(postfix, "benchmark") for postfix in postfix_corpus]),
+        "parse_requires_string": (parse_uncached, [(area.requires, area) for area in areas]),
+        "parse_requires_string_cached": (parse_requires_string, [(area.requires, area) for area in areas]),
+        "fold_constants": (fold_constants, [(tree, get_fold_values(tree)) for tree in trees]),
+        "compile_requires_string": (compiler.compile_requires_string, [(area.requires, area) for area in compilable_areas]),
+        "compiled_rule": (evaluate_rule, [(rule, state) for rule in rules]),
+        "convert_string_to_type": (convert_string_to_type, conversion_corpus),
+        "YamlCompare": (YamlCompare, [(world, world.multiworld, world.player, args, True) for args in yaml_comparisons]),
+        "YamlCompare_cached": (YamlCompare, [(world, world.multiworld, world.player, args) for args in yaml_comparisons]),
+        "location_can_reach": (check_every_location, [(locations, state)]),
+        "location_access_mask": (world.get_location_access_mask, [(state,)]),
+    }
+
+def run_corpus(func: Callable, corpus: list[tuple]):
+    for args in corpus:
+        func(*args)
+
+def measure(name: str, func: Callable, corpus: list[tuple], minimum_seconds: float) -> dict[str, Any]:
+    """Call func over the whole corpus until minimum_seconds have passed, then once more while tracing the allocations"""
+    run_corpus(func, corpus) # warm up the caches
+
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        run_corpus(func, corpus)
+        calls += len(corpus)
+        elapsed = time.perf_counter() - start
+        if elapsed >= minimum_seconds:
+            break
+
+    tracemalloc.start()
+    try:
+        run_corpus(func, corpus)
+        allocated, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "name": name,
+        "corpus": len(corpus),
+        "calls": calls,
+        "ops_per_second": calls / elapsed,
+        "peak_memory": peak,
+        "retained_memory": allocated,
+    }
+
+def format_result(result: dict[str, Any]) -> str:
+    return (f"{result['name']:<28} {result['ops_per_second']:>14,.0f} {result['corpus']:>8} "
+            f"{result['peak_memory'] / 1024:>12.1f} {result['retained_memory'] / 1024:>14.1f}")
+
+def main(args: Optional[list[str]] = None) -> int:
+    parser = ArgumentParser(description="Benchmark the requires parser and evaluator primitives")
+    parser.add_argument("--only", nargs="+", metavar="NAME", help="only run these benchmarks")
+    parser.add_argument("--min-time", type=float, default=1.0, help="the least seconds each benchmark runs for")
+    parser.add_argument("--save", metavar="PATH", help="save the results to a .json file")
+    parsed = parser.parse_args(args)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    benchmarks = get_benchmarks()
+    unknown = set(parsed.only or ()) - set(benchmarks)
+    if unknown:
+        parser.error(f"unknown benchmark(s) {', '.join(sorted(unknown))}, they are {', '.join(benchmarks)}")
+
+    logging.info(f"{'Primitive':<28} {'Ops/sec':>14} {'Corpus':>8} {'Peak (KiB)':>12} {'Retained (KiB)':>14}")
+    results = []
+    for name, (func, corpus) in benchmarks.items():
+        if parsed.only and name not in parsed.only:
+            continue
+        result = measure(name, func, corpus, parsed.min_time)
+        logging.info(format_result(result))
+        results.append(result)
+
+    if parsed.save:
+        with open(parsed.save, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
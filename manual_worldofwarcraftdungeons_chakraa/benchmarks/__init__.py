@@ -0,0 +1 @@
+# intentionally empty
\ No newline at end of file
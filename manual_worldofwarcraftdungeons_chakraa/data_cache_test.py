@@ -0,0 +1,213 @@
+import json
+import os
+import pkgutil
+import tempfile
+import unittest
+from typing import Optional
+from unittest.mock import patch
+
+import Utils
+
+from . import ManualWorld
+from .DataCache import DataCache, data_cache
+from .DataValidation import DataValidation, runGenerationDataValidation, FORCE_VALIDATION_ENVIRONMENT_VARIABLE
+from .Helpers import DATA_DIRECTORY_ENVIRONMENT_VARIABLE, load_data_file
+from .Items import item_name_to_id
+from .Locations import location_name_to_id
+
+get_package_data = pkgutil.get_data
+
+
+class CacheDirectoryTestBase(unittest.TestCase):
+    """Point the user cache directory at a temporary one and leave the data bundle out, unless a test sets self.bundle"""
+
+    def setUp(self):
+        if data_cache.hash is None:
+            self.skipTest("The data cache is turned off")
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.bundle: Optional[bytes] = None
+        self.changed_files: dict[str, bytes] = {}
+
+        for patcher in (patch.object(Utils, "cache_path", lambda *args: os.path.join(self.directory, *args)),
+                        patch.object(pkgutil, "get_data", self.get_package_data),
+                        patch.object(data_cache, "bundle_validation", None),
+                        patch.dict(os.environ, {DataCache.environment_variable: "1", FORCE_VALIDATION_ENVIRONMENT_VARIABLE: ""})):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        os.environ.pop(DATA_DIRECTORY_ENVIRONMENT_VARIABLE, None)
+
+    def get_package_data(self, package: str, resource: str) -> Optional[bytes]:
+        """pkgutil.get_data, with self.bundle as the data bundle and the package files changed by self.changed_files"""
+        if package == data_cache.package and resource == DataCache.bundle_file_name:
+            return self.bundle
+        if package == data_cache.package and resource in self.changed_files:
+            return self.changed_files[resource]
+        return get_package_data(package, resource)
+
+    def write_data_directory(self, name: str, extra_item_name: str) -> str:
+        """A data directory overriding data/ with the same items and one more, set as the one to load"""
+        items = load_data_file("items.json")
+        items.append({"name": extra_item_name, "category": ["Dungeons"], "count": 1})
+        data_directory = os.path.join(self.directory, name)
+        os.makedirs(data_directory, exist_ok=True)
+        with open(os.path.join(data_directory, "items.json"), "w", encoding="utf-8") as file:
+            json.dump(items, file)
+        os.environ[DATA_DIRECTORY_ENVIRONMENT_VARIABLE] = data_directory
+        return data_directory
+
+
+class DataCacheTest(CacheDirectoryTestBase):
+    def save_cold_cache(self) -> DataCache:
+        cache = DataCache(data_cache.package)
+        self.assertFalse(cache.loaded)
+        cache.tables = {part: data_cache.tables[part] for part in DataCache.parts}
+        cache.save()
+        self.assertTrue(os.path.isfile(cache.path))
+        return cache
+
+    def test_warm_load(self):
+        cold = self.save_cold_cache()
+
+        warm = DataCache(data_cache.package)
+        self.assertTrue(warm.loaded)
+        self.assertFalse(warm.from_bundle)
+        self.assertEqual(warm.path, cold.path)
+        self.assertEqual(warm.tables, cold.tables)
+        self.assertEqual(warm.tables["Items"]["item_name_to_id"], item_name_to_id)
+        self.assertEqual(warm.tables["Locations"]["location_name_to_id"], location_name_to_id)
+
+    def test_changed_data_is_loaded_again(self):
+        self.write_data_directory("data", "Data Cache Test Item")
+        cold = self.save_cold_cache()
+
+        self.write_data_directory("data", "Other Data Cache Test Item")
+        changed = DataCache(data_cache.package)
+        self.assertNotEqual(changed.hash, cold.hash)
+        self.assertNotEqual(changed.path, cold.path)
+        self.assertFalse(changed.loaded)
+
+        # saving the tables of the changed data removes the outdated cache
+        changed.tables = cold.tables
+        changed.save()
+        self.assertTrue(os.path.isfile(changed.path))
+        self.assertFalse(os.path.isfile(cold.path))
+
+    def test_cache_of_each_data_directory_is_kept(self):
+        cold = self.save_cold_cache()
+
+        self.write_data_directory("data", "Data Cache Test Item")
+        other = self.save_cold_cache()
+        self.assertNotEqual(other.path, cold.path)
+        self.assertTrue(os.path.isfile(cold.path))
+
+        # switching back to data/ loads its cache, which the other data directory didn't remove
+        os.environ.pop(DATA_DIRECTORY_ENVIRONMENT_VARIABLE)
+        warm = DataCache(data_cache.package)
+        self.assertTrue(warm.loaded)
+        self.assertEqual(warm.path, cold.path)
+        self.assertTrue(os.path.isfile(other.path))
+
+    def test_unreadable_cache_is_ignored(self):
+        cold = self.save_cold_cache()
+        with open(cold.path, "wb") as file:
+            file.write(b"not a pickle")
+
+        cache = DataCache(data_cache.package)
+        self.assertFalse(cache.loaded)
+        self.assertEqual(cache.tables, {})
+
+
+class DataBundleTest(CacheDirectoryTestBase):
+    def write_bundle(self) -> DataCache:
+        cache = DataCache(data_cache.package)
+        cache.tables = {part: data_cache.tables[part] for part in DataCache.parts}
+        path = os.path.join(self.directory, "bundle.pickle")
+        cache.write_bundle(path, {"Rules": {"|Data Bundle Test Item|": ("Data Bundle Test Item",)}}, validated=True)
+        with open(path, "rb") as file:
+            self.bundle = file.read()
+        return cache
+
+    def test_bundle_is_used(self):
+        built = self.write_bundle()
+
+        cache = DataCache(data_cache.package)
+        self.assertEqual(cache.hash, built.hash)
+        self.assertTrue(cache.loaded)
+        self.assertTrue(cache.from_bundle)
+        self.assertIsNone(cache.path)
+        self.assertEqual(cache.tables["Items"]["item_name_to_id"], item_name_to_id)
+        self.assertEqual(cache.tables["Rules"], {"|Data Bundle Test Item|": ("Data Bundle Test Item",)})
+        self.assertTrue(cache.is_validated())
+
+        # the bundle isn't written to the user cache directory
+        cache.save()
+        self.assertEqual(os.listdir(self.directory), ["bundle.pickle"])
+
+    def assertBundleIgnored(self, built: DataCache):
+        cache = DataCache(data_cache.package)
+        self.assertNotEqual(cache.hash, built.hash)
+        self.assertFalse(cache.loaded)
+        self.assertFalse(cache.from_bundle)
+        self.assertNotIn("Rules", cache.tables)
+        self.assertFalse(cache.is_validated())
+
+    def test_bundle_is_ignored_when_a_data_file_changes(self):
+        built = self.write_bundle()
+        self.write_data_directory("data", "Data Cache Test Item")
+        self.assertBundleIgnored(built)
+
+    def test_bundle_is_ignored_when_a_hook_changes(self):
+        built = self.write_bundle()
+        hook_file_name = "hooks/Rules.py"
+        self.changed_files[hook_file_name] = get_package_data(data_cache.package, hook_file_name) + b"\n# changed\n"
+        self.assertBundleIgnored(built)
+
+
+class ValidationSkipTest(CacheDirectoryTestBase):
+    def setUp(self):
+        super().setUp()
+        patcher = patch.object(DataValidation, "reset_index", wraps=DataValidation.reset_index)
+        self.reset_index = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def assertValidated(self, force: bool = False):
+        calls = self.reset_index.call_count
+        runGenerationDataValidation(ManualWorld, force)
+        self.assertEqual(self.reset_index.call_count, calls + 1)
+
+    def assertSkipped(self):
+        calls = self.reset_index.call_count
+        runGenerationDataValidation(ManualWorld)
+        self.assertEqual(self.reset_index.call_count, calls)
+
+    def test_skip_once_validated(self):
+        self.assertFalse(data_cache.is_validated())
+        self.assertValidated()
+        self.assertTrue(data_cache.is_validated())
+        self.assertTrue(os.path.isfile(data_cache.get_validation_path(data_cache.get_validation_hash())))
+        self.assertSkipped()
+
+    def test_force(self):
+        self.assertValidated()
+        self.assertValidated(force=True)
+
+        os.environ[FORCE_VALIDATION_ENVIRONMENT_VARIABLE] = "1"
+        self.assertValidated()
+        os.environ[FORCE_VALIDATION_ENVIRONMENT_VARIABLE] = "0"
+        self.assertSkipped()
+
+        with patch.object(ManualWorld, "force_data_validation", True):
+            self.assertValidated()
+        self.assertSkipped()
+
+    def test_validation_of_other_data_is_forgotten(self):
+        self.assertValidated()
+        with patch.object(data_cache, "hash", "other data"):
+            self.assertFalse(data_cache.is_validated())
+            self.assertValidated()
+        # only the last validated data is remembered
+        self.assertFalse(data_cache.is_validated())
+        self.assertValidated()
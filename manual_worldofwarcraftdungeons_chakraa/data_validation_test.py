@@ -0,0 +1,229 @@
+import copy
+import json
+import random
+import unittest
+from typing import Callable
+from unittest.mock import patch
+
+from test.TestBase import WorldTestBase
+
+from .Data import game_table, item_table, location_table, region_table
+from .DataValidation import DataValidation, ValidationError, ValidationIndex
+from .Game import game_name
+
+
+class DataValidationTest(unittest.TestCase):
+    """Break copies of the tables in the ways the generation validators catch, and check each one raises the error it always did"""
+
+    generation_checks = [
+        DataValidation.checkItemNamesInLocationRequires, DataValidation.checkItemNamesInRegionRequires,
+        DataValidation.checkRegionNamesInLocations, DataValidation.checkItemsThatShouldBeRequired,
+        DataValidation.checkRegionsConnectingToOtherRegions, DataValidation.checkForDuplicateItemNames,
+        DataValidation.checkForDuplicateLocationNames, DataValidation.checkForDuplicateRegionNames,
+        DataValidation.checkStartingItemsForValidItemsAndCategories, DataValidation.checkPlacedItemsForValidItems,
+        DataValidation.checkPlacedItemCategoriesForValidItemCategories, DataValidation.checkForNonStartingRegionsThatAreUnreachable,
+    ]
+
+    def setUp(self):
+        self.items = copy.deepcopy(item_table)
+        self.locations = copy.deepcopy(location_table)
+        self.regions = copy.deepcopy(region_table)
+        self.game = copy.deepcopy(game_table)
+
+        for patcher in (patch.object(DataValidation, "item_table", self.items),
+                        patch.object(DataValidation, "location_table", self.locations),
+                        patch.object(DataValidation, "region_table", self.regions),
+                        patch.object(DataValidation, "game_table", self.game)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        DataValidation.reset_index()
+        self.addCleanup(DataValidation.reset_index)
+
+    def get_location(self, name: str) -> dict:
+        return next(location for location in self.locations if location["name"] == name)
+
+    def get_item(self, name: str) -> dict:
+        return next(item for item in self.items if item["name"] == name)
+
+    def assertValidationError(self, check: Callable[[], None], message: str):
+        DataValidation.reset_index()
+        with self.assertRaises(ValidationError) as context:
+            check()
+        self.assertEqual(str(context.exception), message)
+
+    def test_data_passes(self):
+        for check in self.generation_checks:
+            check()
+
+    def test_unknown_item_in_location_requires(self):
+        self.get_location("Deadmines - Item 01")["requires"] = "|Deadmines| and |Missing Dungeon:2|"
+        self.assertValidationError(DataValidation.checkItemNamesInLocationRequires,
+                                   "Item Missing Dungeon is required by location Deadmines - Item 01 but is misspelled or does not exist.")
+
+    def test_unknown_category_in_location_requires(self):
+        self.get_location("Deadmines - Item 02")["requires"] = "|Deadmines| or |@Missing Expansion:ALL|"
+        self.assertValidationError(DataValidation.checkItemNamesInLocationRequires,
+                                   "Item category Missing Expansion is required by location Deadmines - Item 02 but is misspelled or does not exist.")
+
+    def test_unknown_item_in_dict_location_requires(self):
+        self.get_location("Deadmines - Item 01")["requires"] = ["Deadmines", {"or": ["Ragefire Chasm", "Missing Dungeon"]}]
+        self.assertValidationError(DataValidation.checkItemNamesInLocationRequires,
+                                   "Item Missing Dungeon is required by location Deadmines - Item 01 but is misspelled or does not exist.")
+
+        self.get_location("Deadmines - Item 01")["requires"] = ["Deadmines", "Missing Dungeon:3"]
+        self.assertValidationError(DataValidation.checkItemNamesInLocationRequires,
+                                   "Item Missing Dungeon is required by location Deadmines - Item 01 but is misspelled or does not exist.")
+
+    def test_unknown_item_and_category_in_region_requires(self):
+        self.regions["Goal"]["requires"] = "|@Apexis Crystals:ALL| and |Missing Dungeon|"
+        self.assertValidationError(DataValidation.checkItemNamesInRegionRequires,
+                                   "Item Missing Dungeon is required by region Goal but is misspelled or does not exist.")
+
+        self.regions["Goal"]["requires"] = "|@Missing Expansion:HALF|"
+        self.assertValidationError(DataValidation.checkItemNamesInRegionRequires,
+                                   "Item category Missing Expansion is required by region Goal but is misspelled or does not exist.")
+
+    def test_unknown_region_of_location(self):
+        self.get_location("Deadmines - Item 01")["region"] = "Missing Region"
+        self.assertValidationError(DataValidation.checkRegionNamesInLocations,
+                                   "Region Missing Region is set for location Deadmines - Item 01, but the region is misspelled or does not exist.")
+
+    def test_required_item_not_progression(self):
+        self.get_item("Deadmines")["progression"] = False
+        self.assertValidationError(DataValidation.checkItemsThatShouldBeRequired,
+                                   "Item Deadmines is required by location Deadmines - Item 01, but the item is not marked as progression.")
+
+    def test_required_item_not_progression_in_region_requires(self):
+        self.get_item("Apexis Crystal")["progression"] = False
+        self.regions["Goal"]["requires"] = "|Apexis Crystal| and |@Apexis Crystals:ALL|"
+        self.assertValidationError(DataValidation.checkItemsThatShouldBeRequired,
+                                   "Item Apexis Crystal is required by region Goal, but the item is not marked as progression.")
+
+        # progression_skip_balancing is progression too
+        self.get_item("Apexis Crystal")["progression_skip_balancing"] = True
+        DataValidation.reset_index()
+        DataValidation.checkItemsThatShouldBeRequired()
+
+    def test_unknown_connected_region(self):
+        self.regions["Goal"]["connects_to"] = ["Missing Region"]
+        self.assertValidationError(DataValidation.checkRegionsConnectingToOtherRegions,
+                                   "Region Goal connects to a region Missing Region, which is misspelled or does not exist.")
+
+    def test_duplicate_names(self):
+        self.items.append(copy.deepcopy(self.get_item("Deadmines")))
+        self.assertValidationError(DataValidation.checkForDuplicateItemNames, "Item Deadmines is defined more than once.")
+
+        self.locations.append(copy.deepcopy(self.get_location("Deadmines - Item 02")))
+        self.assertValidationError(DataValidation.checkForDuplicateLocationNames, "Location Deadmines - Item 02 is defined more than once.")
+
+    def test_invalid_starting_items(self):
+        self.game["starting_items"] = [{"items": ["Deadmines", "Missing Dungeon"]}]
+        self.assertValidationError(DataValidation.checkStartingItemsForValidItemsAndCategories,
+                                   "Item Missing Dungeon is set as a starting item, but is misspelled or is not defined.")
+
+        self.game["starting_items"] = [{"item_categories": ["Dungeons", "Missing Expansion"]}]
+        self.assertValidationError(DataValidation.checkStartingItemsForValidItemsAndCategories,
+                                   "Item category Missing Expansion is set as a starting item category, but is misspelled or is not defined on any items.")
+
+        self.game["starting_items"] = [{"items": ["Deadmines"], "item_categories": ["Dungeons"]}]
+        self.assertValidationError(DataValidation.checkStartingItemsForValidItemsAndCategories,
+                                   "One of your starting item definitions has both 'items' and 'item_categories' defined, but only one will be applied.")
+
+    def test_invalid_placed_items(self):
+        self.get_location("Deadmines - Item 01")["place_item"] = ["Deadmines", "Missing Dungeon"]
+        self.assertValidationError(DataValidation.checkPlacedItemsForValidItems,
+                                   "Item Missing Dungeon is placed (using place_item) on a location, but is misspelled or is not defined.")
+
+        self.get_location("Deadmines - Item 02")["place_item_category"] = ["Missing Expansion"]
+        self.assertValidationError(DataValidation.checkPlacedItemCategoriesForValidItemCategories,
+                                   "Item category Missing Expansion is placed (using place_item_category) on a location, but is misspelled or is not defined.")
+
+    def test_unreachable_region(self):
+        self.regions["Unreachable Region"] = {"starting": False, "connects_to": ["Goal"], "requires": []}
+        self.assertValidationError(DataValidation.checkForNonStartingRegionsThatAreUnreachable,
+                                   "The region 'Unreachable Region' is set as a non-starting region, but has no regions that connect to it. It will be inaccessible.")
+
+        # connecting to it from the starting region makes it reachable
+        self.regions["Goal"]["connects_to"] = ["Unreachable Region"]
+        DataValidation.reset_index()
+        DataValidation.checkForNonStartingRegionsThatAreUnreachable()
+
+
+class ItemValueDemandsTest(unittest.TestCase):
+    """Check the ItemValue requirements read from the parsed requires against the regex search of their json the pre-fill check used to do"""
+
+    requires_variants = [
+        "{ItemValue(Coins:5)}",
+        "{ItemValue(coins:5)} and {ItemValue( Coins :7)}",
+        "|Deadmines| and {ItemValue(Coins: 3)}",
+        "{ItemValue(Coins:5)} or ({ItemValue(Gems:2)} and |Deadmines|)",
+        "{ItemValue(Gems:12,1)} and {ItemValue(Coins:0)}",
+        "{YamlEnabled(include_legion)} and {ItemValue(Coins:6)}",
+        "{OptAll(|Deadmines| and {ItemValue(Gems:9)})}",
+        "|Deadmines| or |@Dungeons:2|",
+        ["Deadmines", "{ItemValue(Coins:8)}"],
+        [{"or": ["Deadmines", "{ItemValue(Gems:4)}"]}, "{ItemValue(gems:1)}"],
+        ["Deadmines"],
+        "",
+        [],
+    ]
+
+    def get_requires(self) -> list[str | list]:
+        """The variants, and random combinations of the ones in string form requesting the same value more than once"""
+        rng = random.Random(1)
+        string_variants = [requires for requires in self.requires_variants if isinstance(requires, str) and requires]
+        combinations = [f" {rng.choice(['and', 'or'])} ".join(f"({requires})" for requires in rng.sample(string_variants, rng.randint(2, 4)))
+                        for _ in range(50)]
+        return self.requires_variants + combinations
+
+    @staticmethod
+    def get_regex_demands(requires: str | list) -> dict[str, int]:
+        return DataValidation._checkLocationRequiresForItemValueWithRegex({}, json.dumps(requires))
+
+    def test_demands_match_regex(self):
+        requires_list = self.get_requires()
+        locations = [{"name": f"Location {index}", "requires": requires} for index, requires in enumerate(requires_list)]
+        regions = {f"Region {index}": {"requires": requires, "entrance_requires": {"Region 0": requires}, "exit_requires": {"Region 1": requires}}
+                   for index, requires in enumerate(requires_list)}
+        location_demands, region_demands, entrance_demands, exit_demands = ValidationIndex([], locations, regions).get_item_value_demands()
+
+        for index, requires in enumerate(requires_list):
+            with self.subTest(requires=requires):
+                expected = self.get_regex_demands(requires)
+                self.assertEqual(dict(location_demands.get(f"Location {index}", ())), expected)
+                self.assertEqual(dict(region_demands.get(f"Region {index}", ())), expected)
+                self.assertEqual(dict(entrance_demands.get(f"Region {index}", {}).get("Region 0", ())), expected)
+                self.assertEqual(dict(exit_demands.get(f"Region {index}", {}).get("Region 1", ())), expected)
+
+
+class ItemValueCheckTest(WorldTestBase):
+    """The pre-fill check still raises when the progression items don't have the value the requires ask for"""
+    game = game_name
+
+    def run_value_check(self, location_requires: str | list, region_requires: str | list):
+        locations = copy.deepcopy(location_table)
+        regions = copy.deepcopy(region_table)
+        next(location for location in locations if location.get("victory"))["requires"] = location_requires
+        regions["Goal"]["requires"] = region_requires
+
+        with patch.object(DataValidation, "location_table", locations), patch.object(DataValidation, "region_table", regions):
+            DataValidation.reset_index()
+            try:
+                DataValidation.preFillCheckIfEnoughItemsForValue(self.world, self.multiworld)
+            finally:
+                DataValidation.reset_index()
+
+    def test_not_enough_value(self):
+        with self.assertRaises(ValidationError) as context:
+            self.run_value_check("|Deadmines| and {ItemValue(Coins:5)}", ["{ItemValue(coins :3)}", "{ItemValue(Gems:2)}"])
+        self.assertEqual(str(context.exception), "There are not enough progression items for the following value(s): \n"
+                                                 "   'coins': 0 out of the 5 coins worth of progression items required can be found.\n"
+                                                 "   'gems': 0 out of the 2 gems worth of progression items required can be found.")
+
+    def test_enough_value(self):
+        crystals = self.world.get_item_counts(self.player, only_progression=True)["Apexis Crystal"]
+        with patch.object(self.world, "item_values", {self.player: {"coins": {"Apexis Crystal": 1}}}, create=True):
+            self.run_value_check("{ItemValue(Coins:%d)}" % crystals, "|@Apexis Crystals:ALL|")
+
+            with self.assertRaises(ValidationError):
+                self.run_value_check("{ItemValue(Coins:%d)}" % (crystals + 1), "|@Apexis Crystals:ALL|")
@@ -3,7 +3,7 @@ from worlds.AutoWorld import World
 from BaseClasses import MultiWorld, CollectionState, Item
 
 # Object classes from Manual -- extending AP core -- representing items and locations that are used in generation
-from ..Items import ManualItem
+from ..Items import ManualItem, category_to_item_names, item_name_to_categories
 from ..Locations import ManualLocation
 from .Options import GameMode, ApexisCrystals, LocationsPerDungeon, TotalDungeons
 
@@ -44,12 +44,10 @@ def before_create_regions(world: World, multiworld: MultiWorld, player: int):
     num_dungeons = get_option_value(multiworld, player, "amount_of_dungeons")  # Retrieve the configured number of dungeons
     gamemode = get_option_value(multiworld, player, "gamemode")  # Determine the selected game mode
 
-    items_data = world.item_name_to_item.values()  # Access all item data
-
-    valid_dungeons = [item for item in items_data if "Dungeons" in item.get("category", [])]  # Identify all dungeons
+    valid_dungeons = [world.item_name_to_item[name] for name in category_to_item_names.get("Dungeons", ())]  # Identify all dungeons
 
     if gamemode == 0:  # Apply filtering for Free-to-Play mode if selected
-        valid_dungeons = [item for item in valid_dungeons if "Free to Play" in item.get("category", [])]
+        valid_dungeons = [item for item in valid_dungeons if "Free to Play" in item_name_to_categories[item["name"]]]
 
     # List of valid expansion categories
     valid_categories = {
@@ -139,8 +137,7 @@ def before_create_items_filler(item_pool: list, world: World, multiworld: MultiW
 
     for item in list(item_pool):  # Copy the list to avoid modification issues
         
-        item_table_element = next(i_t for i_t in item_table if i_t['name'] == item.name)
-        item_categories = item_table_element.get("category", [])
+        item_categories = item_name_to_categories.get(item.name, frozenset())
 
         if "Dungeons" not in item_categories:
             filtered_items.append(item)
@@ -0,0 +1,151 @@
+import io
+import os
+import pstats
+import tempfile
+import tracemalloc
+import unittest
+from unittest.mock import patch
+
+from test.TestBase import WorldTestBase
+
+from . import ManualWorld
+from .Game import game_name
+from .Profiling import StageTimings
+
+
+class StageTimingsTracingTest(unittest.TestCase):
+    """tracemalloc is started for the stages of the players that report their timings, and stopped once none of them runs a stage"""
+
+    def setUp(self):
+        if tracemalloc.is_tracing():
+            self.skipTest("tracemalloc is already tracing")
+
+        for patcher in (patch.object(StageTimings, "tracing_users", 0), patch.object(StageTimings, "started_tracing", False)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(tracemalloc.stop)
+
+        self.first = StageTimings("player 1", report=True)
+        self.second = StageTimings("player 2", report=True)
+
+    def assertNotTracing(self):
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertEqual(StageTimings.tracing_users, 0)
+        self.assertFalse(StageTimings.started_tracing)
+
+    def test_stages_of_two_players(self):
+        self.assertNotTracing()
+        for timings in (self.first, self.second):
+            with timings.measure("generate_early"):
+                self.assertTrue(tracemalloc.is_tracing())
+                self.assertEqual(StageTimings.tracing_users, 1)
+                with timings.measure("before_generate_early"):
+                    self.assertEqual(StageTimings.tracing_users, 1)
+            self.assertNotTracing()
+
+        # one player's stage running another's, the memory is traced until the outer one is done
+        with self.first.measure("create_items"):
+            with self.second.measure("create_items"):
+                self.assertEqual(StageTimings.tracing_users, 2)
+            self.assertTrue(tracemalloc.is_tracing())
+            self.assertEqual(StageTimings.tracing_users, 1)
+        self.assertNotTracing()
+
+        for timings in (self.first, self.second):
+            self.assertTrue(all(record["memory_delta"] is not None for record in timings.records))
+            timings.finish()
+        self.assertNotTracing()
+
+    def test_stage_raising(self):
+        with self.assertRaises(ValueError):
+            with self.first.measure("create_regions"):
+                with self.first.measure("after_create_regions"):
+                    raise ValueError("hook failed")
+        self.assertNotTracing()
+        self.assertEqual([record["name"] for record in self.first.records], ["after_create_regions", "create_regions"])
+
+    def test_tracing_started_elsewhere(self):
+        tracemalloc.start()
+        with self.first.measure("set_rules"):
+            pass
+        self.assertTrue(tracemalloc.is_tracing())
+        self.assertIsNotNone(self.first.records[0]["memory_delta"])
+
+    def test_without_report(self):
+        timings = StageTimings("player 3")
+        with timings.measure("fill_slot_data"):
+            self.assertFalse(tracemalloc.is_tracing())
+        self.assertIsNone(timings.records[0]["memory_delta"])
+
+
+class GenerationProfilingTest(WorldTestBase):
+    """Generate with the profiling modes turned on and check what they add to the spoiler"""
+    game = game_name
+
+    profiling_attributes = ("rules_profiling", "stage_timings_report", "stages_cprofiling")
+
+    def world_setup(self, *args, **kwargs):
+        for attribute in self.profiling_attributes:
+            patcher = patch.object(ManualWorld, attribute, True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        super().world_setup(*args, **kwargs)
+
+    def get_spoiler_section(self, title: str) -> list[str]:
+        """The lines of a section of the spoiler the world writes, up to the next section"""
+        handle = io.StringIO()
+        self.world.write_spoiler(handle)
+        spoiler = handle.getvalue()
+        self.assertIn(f"\n\n{title}\n\n", spoiler)
+        return spoiler.split(f"\n\n{title}\n\n", 1)[1].split("\n\n", 1)[0].splitlines()
+
+    def test_rules_profile(self):
+        state = self.multiworld.get_all_state(False)
+        location_names = set()
+        for location in self.multiworld.get_locations(self.player):
+            self.assertTrue(location.can_reach(state))
+            location_names.add(location.name)
+
+        lines = self.get_spoiler_section(f"Rule profile for {self.multiworld.get_player_name(self.player)}:")
+        self.assertEqual(lines[0].split(), ["Kind", "Calls", "Total", "(ms)", "Avg", "(us)", "True", "Name"])
+        rows = [line.split(maxsplit=5) for line in lines[1:]]
+        location_rows = {name: (int(calls), true_results) for kind, calls, _, _, true_results, name in rows if kind == "location"}
+
+        # every location rule was called, and was true at least for the state with every item
+        self.assertEqual(set(location_rows), location_names)
+        for calls, true_results in location_rows.values():
+            self.assertGreaterEqual(calls, 1)
+            self.assertGreater(float(true_results.rstrip("%")), 0)
+        self.assertIn("region", [row[0] for row in rows])
+
+        # slowest first
+        totals = [float(row[2]) for row in rows]
+        self.assertEqual(totals, sorted(totals, reverse=True))
+
+    def test_stage_timings(self):
+        # the memory isn't traced anymore once the stages are done
+        self.assertEqual(StageTimings.tracing_users, 0)
+        self.assertFalse(StageTimings.started_tracing)
+
+        lines = self.get_spoiler_section(f"Generation stage timings for player {self.player} ({self.multiworld.get_player_name(self.player)}):")
+        stages = [line for line in lines if not line.startswith(" ")]
+        hooks = [line for line in lines if line.startswith("    ")]
+        self.assertEqual([line.split(" took ")[0] for line in stages[:3]], ["create_regions", "create_items", "set_rules"])
+        self.assertTrue(hooks)
+        for line in stages + hooks:
+            self.assertRegex(line.strip(), r"^\w+ took \d+\.\d\d ms, traced memory [+-]\d+\.\d KiB$")
+
+    def test_stage_profiles(self):
+        with tempfile.TemporaryDirectory() as directory:
+            ManualWorld.stage_generate_output(self.multiworld, directory)
+            player_path = os.path.join(directory, f"{self.multiworld.get_out_file_name_base(self.player)}.pstats")
+            merged_path = os.path.join(directory, f"AP_{self.multiworld.seed_name}_{game_name}.pstats")
+            self.assertEqual(sorted(os.listdir(directory)), sorted([os.path.basename(player_path), os.path.basename(merged_path)]))
+
+            player_stats = pstats.Stats(player_path)
+            merged_stats = pstats.Stats(merged_path)
+
+        # the profiled stages and what they call
+        function_names = {function_name for _, _, function_name in player_stats.stats}
+        self.assertLessEqual({"create_regions", "create_items", "set_rules", "compile_area"}, function_names)
+        self.assertEqual(merged_stats.total_calls, player_stats.total_calls)
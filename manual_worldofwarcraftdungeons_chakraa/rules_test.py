@@ -0,0 +1,405 @@
+import math
+import random
+import re
+import sys
+from collections import Counter
+from typing import Callable
+from unittest.mock import patch
+
+from BaseClasses import CollectionState
+from test.general import setup_multiworld
+from test.TestBase import WorldTestBase
+
+from . import ManualWorld
+
+from .Game import game_name
+from .Helpers import format_state_prog_items_key, ProgItemsCat
+from .Items import category_to_item_names
+from .Regions import regionMap
+from .Rules import RequiresArea, FUNCTION_PATTERN, ITEM_PATTERN, infix_to_postfix, evaluate_postfix, depends_on_state, YamlCompare, set_rules
+from .hooks import Rules as HookRules
+
+
+class ReferenceRulesTestBase(WorldTestBase):
+    """Compare the compiled access rules to the requires evaluated the way Rules.py used to, one requirement at a time"""
+    game = game_name
+
+    crystal_name = "Apexis Crystal"
+    crystal_category = "Apexis Crystals"
+    empty_category = "Filler"
+    categories = ["Dungeons", "Free to Play", "Classic/Cataclysm", "Legion"]
+
+    def get_random(self) -> random.Random:
+        if not hasattr(self, 'random'):
+            self.random = random.Random(1)
+        return self.random
+
+    def get_item_names(self) -> list[str]:
+        return sorted(category_to_item_names["Dungeons"])[:8] + [self.crystal_name]
+
+    def compile(self, requires: str | list | dict):
+        return self.world.rule_compiler.compile_area(RequiresArea(f"Test {requires}", False, requires))
+
+    def count(self, state: CollectionState, name: str) -> int:
+        if name.startswith("@"):
+            return sum(state.count(item_name, self.player) for item_name in category_to_item_names.get(name[1:], ()))
+        return state.count(name, self.player)
+
+    def required_count(self, name: str, item_count: str) -> int:
+        """The count of a requirement like the evaluator computed it, ALL, HALF and percentages from the progression item counts"""
+        if not item_count:
+            return 1
+        lowered_count = item_count.lower()
+        if lowered_count != "all" and lowered_count != "half" and not (item_count.endswith("%") and len(item_count) > 1):
+            return int(item_count)
+
+        items_counts = self.world.get_item_counts(self.player, only_progression=True)
+        if name.startswith("@"):
+            pool_count = sum(items_counts.get(item["name"], 0) for item in self.world.item_name_to_item.values() if name[1:] in item.get("category", []))
+        else:
+            pool_count = items_counts.get(name, 0)
+
+        if lowered_count == "all":
+            return pool_count
+        if lowered_count == "half":
+            return int(pool_count / 2)
+        return math.ceil(pool_count * min(max(float(item_count[:-1]) / 100, 0), 1))
+
+    def evaluate_requirement(self, state: CollectionState, item: str) -> bool:
+        name, _, item_count = item.strip("|").partition(":")
+        name, item_count = name.strip(), item_count.strip()
+        # a category without items could never be met, whatever its count
+        if name.startswith("@") and not category_to_item_names.get(name[1:]):
+            return False
+        return self.count(state, name) >= self.required_count(name, item_count)
+
+    def evaluate_string(self, state: CollectionState, requires: str) -> bool:
+        for func_name, func_args in FUNCTION_PATTERN.findall(requires):
+            # ItemValue is the only function these requires use
+            value_name, value_count = func_args.split(":")
+            total = sum(int(item.get("value", {}).get(value_name, 0)) * state.count(item_name, self.player)
+                        for item_name, item in self.world.item_name_to_item.items())
+            requires = requires.replace("{" + func_name + "(" + func_args + ")}", "1" if total >= int(value_count) else "0")
+
+        for item in ITEM_PATTERN.findall(requires):
+            requires = requires.replace(item, "1" if self.evaluate_requirement(state, item) else "0")
+
+        requires = re.sub(r"\s*\bAND\b\s*", "&", requires, flags=re.IGNORECASE)
+        requires = re.sub(r"\s*\bOR\b\s*", "|", requires, flags=re.IGNORECASE)
+        return evaluate_postfix(infix_to_postfix(requires, "test"), "test")
+
+    def evaluate_dict(self, state: CollectionState, requires: list) -> bool:
+        canAccess = True
+        for item in requires:
+            if isinstance(item, (dict, list)):
+                or_items = item["or"] if isinstance(item, dict) else item
+                if all(state.has(or_item.split(":")[0], self.player, int((or_item.split(":") + ["1"])[1])) for or_item in or_items):
+                    return True
+            elif not state.has(item.split(":")[0], self.player, int((item.split(":") + ["1"])[1])):
+                canAccess = False
+        return canAccess
+
+    def random_requirement(self) -> str:
+        rng = self.get_random()
+        if rng.random() < 0.3:
+            return f"|@{rng.choice(self.categories)}:{rng.randint(1, 4)}|"
+        item_name = rng.choice(self.get_item_names())
+        return f"|{item_name}:{rng.randint(1, 3)}|" if rng.random() < 0.5 else f"|{item_name}|"
+
+    def random_requires(self, depth: int) -> str:
+        rng = self.get_random()
+        if depth == 0 or rng.random() < 0.3:
+            return self.random_requirement()
+        operator = rng.choice([" and ", " or ", " AND ", " OR "])
+        return "(" + operator.join(self.random_requires(depth - 1) for _ in range(rng.randint(2, 3))) + ")"
+
+    def random_dict_requires(self) -> list:
+        rng = self.get_random()
+        requires = []
+        for _ in range(rng.randint(1, 4)):
+            items = rng.sample(self.get_item_names(), 2)
+            if rng.random() < 0.3:
+                requires.append({"or": items})
+            elif rng.random() < 0.2:
+                requires.append(items)
+            else:
+                requires.append(f"{items[0]}:{rng.randint(1, 2)}")
+        return requires
+
+    def random_states(self, count: int, item_names: list[str] | None = None, most: int = 3) -> list[CollectionState]:
+        rng = self.get_random()
+        item_names = item_names or self.get_item_names()
+        states = []
+        for _ in range(count):
+            state = CollectionState(self.multiworld)
+            for item_name in rng.sample(item_names, rng.randint(0, len(item_names))):
+                for _ in range(rng.randint(1, most)):
+                    state.collect(self.world.create_item(item_name), True)
+            states.append(state)
+        return states
+
+
+class CompiledRulesTest(ReferenceRulesTestBase):
+    def test_compiled_string_requires(self):
+        states = self.random_states(20)
+        for _ in range(200):
+            requires = self.random_requires(3)
+            rule = self.compile(requires)
+            for state in states:
+                self.assertEqual(rule(state), self.evaluate_string(state, requires), requires)
+
+    def test_compiled_dict_requires(self):
+        states = self.random_states(20)
+        for _ in range(100):
+            requires = self.random_dict_requires()
+            rule = self.compile(requires)
+            for state in states:
+                self.assertEqual(rule(state), self.evaluate_dict(state, requires), requires)
+
+    def test_identical_requires_share_a_rule(self):
+        for _ in range(50):
+            requires = self.random_requires(2)
+            rule = self.compile(requires)
+            self.assertIs(self.world.rule_compiler.compile_area(RequiresArea("Other Area", True, f"  {requires} ")), rule, requires)
+            self.assertIsNot(self.compile(f"{requires} and |{self.crystal_name}:999|"), rule, requires)
+
+    def assertCategoryCounts(self, state: CollectionState):
+        prog_items = state.prog_items[self.player]
+        for category in self.categories:
+            self.assertEqual(prog_items[format_state_prog_items_key(ProgItemsCat.CATEGORY, category)], self.count(state, f"@{category}"), category)
+
+    def test_category_counts(self):
+        for state in self.random_states(10):
+            self.assertCategoryCounts(state)
+            for item_name in self.get_item_names():
+                while state.count(item_name, self.player):
+                    state.remove(self.world.create_item(item_name))
+                    self.assertCategoryCounts(state)
+
+
+class RegionRequiresRulesTest(ReferenceRulesTestBase):
+    def test_locations_of_region_with_requires(self):
+        # the rules of these locations leave the region's requires to its entrances, the locations must stay out of reach until they're met
+        regions = {name: region["requires"] for name, region in regionMap.items() if isinstance(region.get("requires"), str) and region["requires"].strip()}
+        self.assertTrue(regions)
+
+        crystals = self.world.get_item_counts(self.player, only_progression=True)[self.crystal_name]
+        for count in (0, crystals - 1, crystals):
+            state = CollectionState(self.multiworld)
+            for _ in range(count):
+                state.collect(self.world.create_item(self.crystal_name), True)
+            for region_name, requires in regions.items():
+                region_met = self.evaluate_string(state, requires)
+                for location in self.multiworld.get_region(region_name, self.player).locations:
+                    self.assertEqual(location.can_reach(state), region_met and location.access_rule(state), f"{location.name} with {count} crystals")
+
+
+class RelativeCountRulesTest(ReferenceRulesTestBase):
+    def get_relative_requires(self) -> list[str]:
+        dungeon_name = self.get_item_names()[0]
+        return [f"|@{self.crystal_category}:all|", f"|@{self.crystal_category}:Half|", f"|@{self.crystal_category}:50%|",
+                "|@Dungeons:ALL|", "|@Dungeons:HALF|", "|@Dungeons:25%|", "|@Dungeons:150%|",
+                f"|{self.crystal_name}:ALL|", f"|{self.crystal_name}:HALF|", f"|{self.crystal_name}:10%|", f"|{dungeon_name}:ALL|",
+                f"|@{self.empty_category}:ALL|", f"|@{self.empty_category}:0%|", f"|@{self.empty_category}:ALL| or |{dungeon_name}|",
+                f"|@Dungeons:HALF| and |{self.crystal_name}:10%|"]
+
+    def get_relative_states(self) -> list[CollectionState]:
+        """States around the counts the requires need, with every dungeon of the pool in some and random ones in the others"""
+        rng = self.get_random()
+        pool_counts = self.world.get_item_counts(self.player, only_progression=True)
+        crystal_count = pool_counts.get(self.crystal_name, 0)
+        dungeon_names = [name for name in category_to_item_names["Dungeons"] if pool_counts.get(name)]
+        states = []
+        for count in sorted({0, 1, crystal_count // 10, crystal_count // 2, crystal_count // 2 + 1, crystal_count - 1, crystal_count}):
+            for dungeons in (dungeon_names, rng.sample(dungeon_names, len(dungeon_names) // 2), rng.sample(dungeon_names, len(dungeon_names) // 4)):
+                state = CollectionState(self.multiworld)
+                for item_name in [self.crystal_name] * count + dungeons:
+                    state.collect(self.world.create_item(item_name), True)
+                states.append(state)
+        return states
+
+    def assertRelativeRequires(self):
+        states = self.get_relative_states()
+        for requires in self.get_relative_requires():
+            rule = self.compile(requires)
+            for state in states:
+                self.assertEqual(rule(state), self.evaluate_string(state, requires), requires)
+
+    def test_relative_counts(self):
+        self.assertRelativeRequires()
+
+    def test_item_pool_changed_after_create_items(self):
+        # the counts are the ones of the pool create_items made, whatever happens to the item pool later
+        crystals = [item for item in self.multiworld.itempool if item.name == self.crystal_name and item.player == self.player]
+        for item in crystals[:len(crystals) // 2]:
+            self.multiworld.itempool.remove(item)
+        self.multiworld.itempool += [self.world.create_item(self.get_item_names()[0]) for _ in range(3)]
+        self.assertRelativeRequires()
+
+    def test_item_counts_changed_before_rules(self):
+        # a hook may replace the counts, the rules compiled afterward must use the new ones
+        counts = self.world.item_counts_progression[self.player]
+        self.addCleanup(self.world.item_counts_progression.__setitem__, self.player, counts)
+        self.world.item_counts_progression[self.player] = counts + Counter({self.crystal_name: 20, self.get_item_names()[1]: 1})
+        self.assertRelativeRequires()
+
+
+class FoldedFunctionRulesTest(ReferenceRulesTestBase):
+    def add_function(self, func: Callable):
+        """Make a requires function available the way the ones of hooks/Rules.py are"""
+        patcher = patch.object(HookRules, func.__name__, func, create=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def assertRequires(self, cases: dict[str, Callable[[CollectionState], bool]]):
+        states = self.random_states(20)
+        for requires, expected in cases.items():
+            rule = self.compile(requires)
+            for state in states:
+                self.assertEqual(rule(state), expected(state), requires)
+
+    def test_functions_without_state(self):
+        calls = []
+
+        def FoldTestEnabled(world: "ManualWorld", value: str) -> bool:
+            calls.append(value)
+            return value == "on"
+
+        def FoldTestRequires(player: int, item_name: str) -> str:
+            calls.append(item_name)
+            return f"|{item_name}:2|"
+
+        self.add_function(FoldTestEnabled)
+        self.add_function(FoldTestRequires)
+        first, second = self.get_item_names()[:2]
+        self.assertRequires({
+            f"{{FoldTestEnabled(on)}} and |{first}|": lambda state: self.count(state, first) >= 1,
+            f"{{FoldTestEnabled(off)}} or |{first}|": lambda state: self.count(state, first) >= 1,
+            f"{{FoldTestEnabled(off)}} and |{first}|": lambda state: False,
+            f"{{FoldTestRequires({second})}} or |{first}:3|": lambda state: self.count(state, second) >= 2 or self.count(state, first) >= 3,
+            f"({{FoldTestEnabled(on)}} or |{first}|) and {{FoldTestRequires({second})}}": lambda state: self.count(state, second) >= 2,
+        })
+        # each call is made once for the player when the rules are compiled, never while they are checked
+        self.assertEqual(sorted(calls), sorted(["on", "off", second]))
+
+    def test_functions_with_state(self):
+        calls = []
+
+        def FoldTestHas(state: CollectionState, player: int, item_name: str) -> bool:
+            calls.append(item_name)
+            return state.has(item_name, player, 2)
+
+        def FoldTestStateRequires(state: CollectionState, player: int, item_name: str) -> str:
+            return f"|{item_name}|" if state.has(item_name, player, 2) else f"|{item_name}:3|"
+
+        self.add_function(FoldTestHas)
+        self.add_function(FoldTestStateRequires)
+        first, second = self.get_item_names()[:2]
+        self.assertRequires({
+            f"{{FoldTestHas({first})}} or |{second}:3|": lambda state: self.count(state, first) >= 2 or self.count(state, second) >= 3,
+            f"{{FoldTestStateRequires({first})}} and |{second}|": lambda state: self.count(state, first) >= 2 and self.count(state, second) >= 1,
+        })
+        self.assertGreater(len(calls), 1)
+
+    def test_yaml_compare_state_parameter(self):
+        # YamlCompare still takes the state it never used, hooks calling it directly keep working and requires fold it
+        self.assertFalse(depends_on_state(YamlCompare))
+        crystals = self.world.options.apexis_crystals.value
+        self.assertTrue(YamlCompare(self.world, self.multiworld, CollectionState(self.multiworld), self.player, f"apexis_crystals == {crystals}"))
+
+        first = self.get_item_names()[0]
+        self.assertRequires({
+            f"{{YamlCompare(apexis_crystals > {crystals})}} or |{first}|": lambda state: self.count(state, first) >= 1,
+            f"{{YamlCompare(apexis_crystals <= {crystals})}} or |{first}|": lambda state: True,
+        })
+
+    def test_options_of_each_player(self):
+        multiworld = setup_multiworld([ManualWorld, ManualWorld])
+        first_world, second_world = multiworld.worlds[1], multiworld.worlds[2]
+        first_world.options.apexis_crystals.value = 10
+        second_world.options.apexis_crystals.value = 50
+        first_world.options.include_legion.value = 1
+        second_world.options.include_legion.value = 0
+
+        item_name = self.get_item_names()[0]
+        without_item = CollectionState(multiworld)
+        with_item = CollectionState(multiworld)
+        for world in (first_world, second_world):
+            with_item.collect(world.create_item(item_name), True)
+
+        # the results of each player, without then with the item
+        for requires, first_results, second_results in (
+                (f"{{YamlCompare(apexis_crystals >= 30)}} or ({{YamlEnabled(include_legion)}} and |{item_name}|)", (False, True), (True, True)),
+                (f"{{YamlCompare(apexis_crystals < 30)}} and |{item_name}|", (False, True), (False, False)),
+                (f"{{YamlDisabled(include_legion)}} or |{item_name}|", (False, True), (True, True))):
+            for world, results in ((first_world, first_results), (second_world, second_results)):
+                rule = world.rule_compiler.compile_area(RequiresArea("Test", False, requires))
+                self.assertEqual((rule(without_item), rule(with_item)), results, f"{requires} for player {world.player}")
+
+
+class MemoizedRulesTest(ReferenceRulesTestBase):
+    """Brute force check of the memoized rules: after every collect and remove, each rule must give what it gives without the remembered results"""
+
+    def add_function(self, func: Callable):
+        patcher = patch.object(HookRules, func.__name__, func, create=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_rules(self) -> list[Callable[[CollectionState], bool]]:
+        def MemoTestHasAny(state: CollectionState, player: int, item_name: str) -> bool:
+            # reads a key its requires don't mention
+            return state.prog_items[player][item_name] > 0
+
+        self.add_function(MemoTestHasAny)
+        item_names = self.get_item_names()
+        requires = [self.random_requires(3) for _ in range(100)] + [self.random_dict_requires() for _ in range(30)]
+        requires += [f"{{MemoTestHasAny({item_name})}} or |{self.get_random().choice(item_names)}:2|" for item_name in item_names]
+        rules = [self.compile(item) for item in requires]
+        rules += [location.access_rule for location in self.multiworld.get_locations(self.player)]
+        return rules
+
+    def evaluate_without_memo(self, state: CollectionState, rules: list[Callable[[CollectionState], bool]]) -> list[bool]:
+        state = state.copy()
+        prog_items = state.prog_items[self.player]
+        memo_prefix = format_state_prog_items_key(ProgItemsCat.RULE, "")
+        for key in [key for key in prog_items if key.startswith(memo_prefix)]:
+            del prog_items[key]
+        return [rule(state) for rule in rules]
+
+    def assertMemoizedRules(self, steps: int = 150):
+        rng = self.get_random()
+        rules = self.get_rules()
+        item_names = self.get_item_names()
+        state = CollectionState(self.multiworld)
+        for _ in range(steps):
+            item_name = rng.choice(item_names)
+            if state.count(item_name, self.player) and rng.random() < 0.4:
+                state.remove(self.world.create_item(item_name))
+            else:
+                state.collect(self.world.create_item(item_name), True)
+            self.assertEqual([rule(state) for rule in rules], self.evaluate_without_memo(state, rules), f"after {item_name}")
+
+    def test_collect_and_remove(self):
+        self.assertTrue(self.world.rule_compiler.memoization)
+        self.assertMemoizedRules()
+
+    def test_hooks_changing_counts(self):
+        first, second = self.get_item_names()[:2]
+
+        def after_collect_item(world, state, Changed, item):
+            if Changed and item.name == first:
+                state.prog_items[item.player][second] += 1
+
+        def after_remove_item(world, state, Changed, item):
+            if Changed and item.name == first:
+                state.prog_items[item.player][second] -= 1
+
+        for hook in (after_collect_item, after_remove_item):
+            patcher = patch.object(sys.modules[ManualWorld.__module__], hook.__name__, hook)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        # the rules are set again with the hooks filled in, like a manual using them would have
+        set_rules(self.world, self.multiworld, self.player)
+        self.assertFalse(self.world.rule_compiler.memoization)
+        self.assertMemoizedRules()